@@ -1,3 +1,5 @@
+import sys
+
 from valutatrade_hub.core.currencies import initialize_currencies
 from valutatrade_hub.core.exceptions import ValutatradeError
 from valutatrade_hub.core.usecases import (
@@ -12,6 +14,9 @@ from valutatrade_hub.parser_service.config import ParserConfig
 from valutatrade_hub.parser_service.scheduler import RatesScheduler
 from valutatrade_hub.parser_service.updater import RatesUpdater
 
+# Источники курсов, которые можно указать в команде update-rates
+_RATE_SOURCES = frozenset(('coingecko', 'exchangerate'))
+
 
 class CLI:
     def __init__(self):
@@ -24,6 +29,145 @@ class CLI:
         self.rates_updater = RatesUpdater(self.parser_config)
         self.scheduler = RatesScheduler(self.rates_updater, 300)
         self.active = True 
+        # Справка статична: собираем текст один раз
+        self._help_text = '\n'.join(self.utils.help())
+
+        # Таблица обработчиков команд: команда -> метод
+        self._dispatch = {
+            'help': self._cmd_help,
+            'exit': self._cmd_exit,
+            'register': self._cmd_register,
+            'login': self._cmd_login,
+            'logout': self._cmd_logout,
+            'show-portfolio': self._cmd_show_portfolio,
+            'buy': self._cmd_buy,
+            'buy-usd': self._cmd_buy_usd,
+            'sell': self._cmd_sell,
+            'get-rate': self._cmd_get_rate,
+            'update-rates': self._cmd_update_rates,
+            'show-rates': self._cmd_show_rates,
+        }
+
+    def _cmd_help(self, args):
+        print(self._help_text)
+
+    def _cmd_exit(self, args):
+        print('\nДо свидания!')
+        self.scheduler.stop()
+        self.active = False
+
+    def _cmd_register(self, args):
+        # проверка на активность сессии
+        if self.session.is_logged_in():
+            username = self.session.current_user.username
+            print(f'Вы в системе под именем {username}. '
+                  'Чтоб зарегистрировать нового пользователя, '
+                  'сперва выполните выход из аккаунта '
+                  'командой logout.')
+            return
+        # Валидация ввода
+        self.utils.validate_command('register', args)
+        # Регистрация
+        username = args[0]
+        password = args[1]
+        initial_usd_amount = args[2]
+        print(self.user_commands\
+              .register(username, password, initial_usd_amount))
+
+    def _cmd_login(self, args):
+        # Валидация ввода
+        self.utils.validate_command('login', args)
+        # Вход
+        if self.session.is_logged_in():
+            username = self.session.get_current_user().username
+            print(f'Вы уже в системе под именем {username}')
+            return
+        username = args[0]
+        password = args[1]
+        print(self.user_commands.login(username, password))
+
+    def _cmd_logout(self, args):
+        # Проверка на активность сессии 
+        if not self.session.is_logged_in():
+            print('Вы не вошли в систему, чтоб из нее выходить.')
+            return
+        # Выход из аккаунта
+        self.session.logout()
+        if not self.session.is_logged_in():
+            print('Вы успешно вышли из системы.')
+
+    def _cmd_show_portfolio(self, args):
+        # Показываем портфель
+        base = args[0] if args else 'USD'
+        print(self.portfolio_commands.show_portfolio(base))
+
+    def _cmd_buy(self, args):
+        # Валидация ввода
+        self.utils.validate_command('buy', args)
+        # Покупка валюты
+        currency = args[0]
+        amount = args[1]
+        print(self.portfolio_commands.buy(currency, amount))
+
+    def _cmd_buy_usd(self, args):
+        # Валидация ввода
+        self.utils.validate_command('buy-usd', args)
+        # Пополнение usd кошелька
+        amount = args[0]
+        print(self.portfolio_commands.buy_usd(amount))
+
+    def _cmd_sell(self, args):
+        # Валидация ввода
+        self.utils.validate_command('sell', args)
+        # Продажа валюты
+        currency = args[0]
+        amount = args[1]
+        print(self.portfolio_commands.sell(currency, amount))
+
+    def _cmd_get_rate(self, args):
+        # Валидация ввода
+        self.utils.validate_command('get-rate', args)
+        # Получение курса
+        currency_from = args[0]
+        currency_to = args[1]
+        print(self.rates_commands.get_rate(currency_from, currency_to))
+
+    def _cmd_update_rates(self, args):
+        # Валидация ввода
+        self.utils.validate_command('update-rates', args)
+        # Запуск обновления курсов
+        source = None
+        base = 'USD'
+        if args:
+            first_arg = args[0].lower()
+            if first_arg in _RATE_SOURCES:
+                source = first_arg
+                base = args[1] if len(args) > 1 else 'USD'
+            else:
+                base = args[0]
+        self.rates_updater.run_update(source, base)
+        print('Курсы успешно обновлены.')
+
+    def _cmd_show_rates(self, args):
+        # Валидация ввода
+        self.utils.validate_command('show-rates', args)
+        currency = None 
+        top = None 
+        base = 'USD'
+        # Заполнение параметров
+        if args:
+            if args[0].lower() == 'top':
+                top = int(args[1])
+                base = args[2] if len(args) > 2 else 'USD'
+            else:
+                currency = args[0]
+                base = args[1] if len(args) > 1 else 'USD'
+        # Запуск функции
+        print(self.rates_commands.show_rates(currency, top, base))
+
+    def _unknown(self, args):
+        print('Неизвестная команда. Используйте команду help, '
+              'чтоб ознакомиться со всеми доступными командами.')
 
     def run(self):
         # Инициализация реестра валют
@@ -37,147 +181,63 @@ class CLI:
               ' отслеживания и симуляции торговли валютами!')
         print('-' * 90)
         print('Доступные команды: \n')
-        print('\n'.join(self.utils.help()))
+        print(self._help_text)
         print()
         print('ВНИМАНИЕ! Во время регистрации необходимо '
               'совершить пополнение USD-кошелька. Кошелек создается '
               'автоматически при первой покупке валюты.\n')
 
+        # Прямое чтение/запись через потоки: input() на каждой итерации
+        # дополнительно сбрасывает stdout и stderr
+        readline = sys.stdin.readline
+        write = sys.stdout.write
+        flush = sys.stdout.flush
+        # Методы, вызываемые на каждой итерации, связываются один раз
+        parse_user_input = self.utils.parse_user_input
+        get_handler = self._dispatch.get
+        unknown = self._unknown
+
         while self.active:
             try:
-                print('\nВведите команду: \n')
-                user_input = input('> ')
+                write('\nВведите команду: \n\n> ')
+                flush()
+                user_input = readline()
+                if not user_input:
+                    # Конец ввода (EOF): завершаем работу
+                    self._cmd_exit([])
+                    break
+                user_input = user_input.rstrip('\n')
                 # Парсинг команды:
-                parsed_input = self.utils.parse_user_input(user_input)
-                command = (parsed_input.get('command')).lower()
+                parsed_input = parse_user_input(user_input)
+                if not parsed_input:
+                    # Пустая строка: просто ждем следующую команду
+                    continue
+                command = parsed_input.get('command')
                 args = parsed_input.get('args')
 
-                match command:
-                    case 'help':
-                        print('\n'.join(self.utils.help()))
-                    case 'exit':
-                        print('\nДо свидания!')
-                        self.scheduler.stop()
-                        self.active = False
-                    case 'register':
-                        # проверка на активность сессии
-                        if self.session.is_logged_in():
-                            username = self.session.current_user.username
-                            print(f'Вы в системе под именем {username}. '
-                                  'Чтоб зарегистрировать нового пользователя, '
-                                  'сперва выполните выход из аккаунта '
-                                  'командой logout.')
-                            continue
-                        # Валидация ввода
-                        self.utils.validate_command(command, args)
-                        # Регистрация
-                        username = args[0]
-                        password = args[1]
-                        initial_usd_amount = float(args[2])
-                        print(self.user_commands\
-                              .register(username, password, initial_usd_amount))
-                    case 'login':
-                        # Валидация ввода
-                        self.utils.validate_command(command, args)
-                        # Вход
-                        if self.session.is_logged_in():
-                            username = self.session.get_current_user().username
-                            print(f'Вы уже в системе под именем {username}')
-                            continue
-                        username = args[0]
-                        password = args[1]
-                        print(self.user_commands.login(username, password))
-                    case 'logout':
-                        # Проверка на активность сессии 
-                        if not self.session.is_logged_in():
-                            print('Вы не вошли в систему, чтоб из нее выходить.')
-                            continue
-                        # Выход из аккаунта
-                        self.session.logout()
-                        if not self.session.is_logged_in():
-                            print('Вы успешно вышли из системы.')
-                    case 'show-portfolio':
-                        # Показываем портфель
-                        base = args[0] if args else 'USD'
-                        print(self.portfolio_commands.show_portfolio(base))
-                    case 'buy':
-                        # Валидация ввода
-                        self.utils.validate_command(command, args)
-                        # Покупка валюты
-                        currency = args[0]
-                        amount = float(args[1])
-                        print(self.portfolio_commands.buy(currency, amount))
-                    case 'buy-usd':
-                        # Валидация ввода
-                        self.utils.validate_command(command, args)
-                        # Пополнение usd кошелька
-                        amount = float(args[0])
-                        print(self.portfolio_commands.buy_usd(amount))
-                    case 'sell':
-                        # Валидация ввода
-                        self.utils.validate_command(command, args)
-                        # Продажа валюты
-                        currency = args[0]
-                        amount = float(args[1])
-                        print(self.portfolio_commands.sell(currency, amount))
-                    case 'get-rate':
-                        # Валидация ввода
-                        self.utils.validate_command(command, args)
-                        # Получение курса
-                        currency_from = args[0]
-                        currency_to = args[1]
-                        print(self.rates_commands.get_rate(currency_from, currency_to))
-                    case 'update-rates':
-                        # Валидация ввода
-                        self.utils.validate_command(command, args)
-                        # Запуск обновления курсов
-                        source = None
-                        base = 'USD'
-                        if args:
-                            if args[0] == 'coingecko' or args[0] == 'exchangerate':
-                                source = args[0]
-                                base = args[1] if len(args) > 1 else 'USD'
-                            else:
-                                base = args[0]
-                        self.rates_updater.run_update(source, base)
-                        print('Курсы успешно обновлены.')
-                    case 'show-rates':
-                        # Валидация ввода
-                        self.utils.validate_command(command, args)
-                        currency = None 
-                        top = None 
-                        base = 'USD'
-                        # Заполнение параметров
-                        if args:
-                            if args[0].lower() == 'top':
-                                top = int(args[1])
-                                base = args[2] if len(args) > 2 else 'USD'
-                            else:
-                                currency = args[0]
-                                base = args[1] if len(args) > 1 else 'USD'
-                        # Запуск функции
-                        print(self.rates_commands.show_rates(currency, top, base))
-                    case '_':
-                        print('Неизвестная команда. Используйте команду help, '
-                              'чтоб ознакомиться со всеми доступными командами.')
-                        continue
-
-            except ValueError as e:
-                print(e)
-            except TypeError as e:
-                print(e)
-            except ValutatradeError as e:
+                # Выбор обработчика по таблице команд
+                handler = get_handler(command, unknown)
+                handler(args)
+
+            except (ValueError, TypeError, ValutatradeError) as e:
+                # Ошибки ввода и бизнес-логики: сообщаем и продолжаем работу
                 print(e)
-            except KeyboardInterrupt:
-                self.scheduler.stop()
             except Exception as e:
-                self.scheduler.stop()
+                # Непредвиденная ошибка одной команды не завершает работу CLI
                 print(f'Произошла непредвиденная ошибка: {e}')
 
 def main():
     """ Точка входа в CLI """
     cli = CLI()
-    cli.run()
+    try:
+        cli.run()
+    except KeyboardInterrupt:
+        print('\nДо свидания!')
+        cli.scheduler.stop()
+    except Exception:
+        # Непредвиденные ошибки не скрываем, но останавливаем планировщик
+        cli.scheduler.stop()
+        raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
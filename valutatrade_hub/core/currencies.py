@@ -1,7 +1,15 @@
+import re
+import sys
 from abc import ABC, abstractmethod
+from types import MappingProxyType
 
 from valutatrade_hub.core.exceptions import CurrencyNotFoundError
 
+# Допустимый код валюты: верхний регистр, 2-5 символов, без пробелов
+_CODE_RE = re.compile(r'\A[A-Z][A-Z0-9]{1,4}\Z')
+# Допустимые типы капитализации (кортеж проверяется быстрее, чем float|int)
+_NUMBER_TYPES = (int, float)
+
 
 class Currency(ABC):
     """
@@ -18,19 +26,19 @@ class Currency(ABC):
         code - верхний регистр, 2-5 символов, без пробелов.
         name - не пустая строка.
     """
+    __slots__ = ('name', 'code')
+
     def __init__(self, name:str, code:str):
         if not isinstance(name, str):
             raise TypeError('Название валюты должно быть строкой.')
-        if not name.strip():
-            raise ValueError('Название валюты не должно быть непустым.')
+        if not name or name.isspace():
+            raise ValueError('Название валюты не должно быть пустым.')
         self.name = name 
         if not isinstance(code, str):
             raise TypeError('Код валюты должен быть строкой.')
-        if ' ' in code.strip():
-            raise ValueError('Код валюты не должен содержать пробелов.')
-        if code != code.upper():
-            raise ValueError(f'Код валюты должен быть записан в \
-                             верхнем регистре, например: {code.upper()}')
+        if not _CODE_RE.match(code):
+            raise ValueError('Код валюты должен состоять из 2-5 символов '
+                             'в верхнем регистре без пробелов, например: USD.')
         self.code = code 
     
     @abstractmethod
@@ -50,6 +58,8 @@ class FiatCurrency(Currency):
     Переопределение: 
         get_display_info() (добавляет страну/зону эмиссии).
     """
+    __slots__ = ('issuing_country',)
+
     def __init__(self, name, code, issuing_country):
         """
         Инициализирует объект фиатной валюты.
@@ -81,6 +91,8 @@ class CryptoCurrency(Currency):
     Переопределение:
          get_display_info() (алгоритм + краткая капитализация).
     """
+    __slots__ = ('algorithm', 'market_cap')
+
     def __init__(self, name, code, algorithm:str, market_cap:float|int):
         """
         Инициализирует объект криптовалюты.
@@ -98,13 +110,13 @@ class CryptoCurrency(Currency):
             raise ValueError('Алгоритм хеширования не должен быть пустым.')
         self.algorithm = algorithm.strip()
 
-        if not isinstance(market_cap, float|int):
+        if not isinstance(market_cap, _NUMBER_TYPES):
             raise TypeError('Рыночная капитализация должна быть числом.')
         self.market_cap = market_cap
     
     def update_market_cap(self, market_cap:float|int):
         """ Метод для обновления информации о последней рыночной капитализации """
-        if not isinstance(market_cap, float|int):
+        if not isinstance(market_cap, _NUMBER_TYPES):
             raise TypeError('Рыночная капитализация должна быть числом ')
         self.market_cap = market_cap
     
@@ -114,25 +126,36 @@ class CryptoCurrency(Currency):
 
 # Реестр валют
 _CURRENCY_REGISTRY  = {}
+# Неизменяемое представление реестра для внешнего чтения (без копирования)
+_CURRENCY_REGISTRY_VIEW = MappingProxyType(_CURRENCY_REGISTRY)
 
-def register_currency(currency: Currency):
+# Реестр передается в функции аргументом по умолчанию:
+# обращение к нему становится локальным (LOAD_FAST), а не глобальным
+def register_currency(currency: Currency, _registry=_CURRENCY_REGISTRY):
     """
     Заносит валюту в глобальный реестр валют
     """
-    _CURRENCY_REGISTRY[currency.code] = currency 
+    # Интернирование кода ускоряет сравнение ключей при поиске в реестре
+    currency.code = sys.intern(currency.code)
+    _registry[currency.code] = currency 
 
-def get_currency(code: str) -> Currency:
+def get_currency(code: str, _registry=_CURRENCY_REGISTRY) -> Currency:
     """
     Получает валюту из реестра по коду.
     """
-    code = code.upper()
-    if code in _CURRENCY_REGISTRY:
-        return _CURRENCY_REGISTRY.get(code)
-    else:
+    currency = _registry.get(code)
+    if currency is None and not code.isupper():
+        # Приводим к верхнему регистру только если код пришел в другом виде
+        code = code.upper()
+        currency = _registry.get(code)
+    if currency is None:
         raise CurrencyNotFoundError(code)
+    return currency
 
 def initialize_currencies():
-    """ Инициализирует реестр валют """
+    """ Инициализирует реестр валют (повторный вызов ничего не делает) """
+    if _CURRENCY_REGISTRY:
+        return
     # Фиатные валюты
     register_currency(FiatCurrency('US Dollar', 'USD', 'Unated States'))
     register_currency(FiatCurrency('Euro', 'EUR', 'Eurozone'))
@@ -148,5 +171,8 @@ def initialize_currencies():
     register_currency(CryptoCurrency('Solana', 'SOL', 'Proof of History', 75705339051))
 
 def get_all_currencies():
-    """ Возвращает доступные валюты в виде словаря """
-    return _CURRENCY_REGISTRY.copy()
\ No newline at end of file
+    """ 
+    Возвращает доступные валюты в виде неизменяемого словаря (только чтение).
+    Для изменяемой копии используйте dict(get_all_currencies()).
+    """
+    return _CURRENCY_REGISTRY_VIEW
\ No newline at end of file
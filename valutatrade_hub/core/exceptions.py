@@ -1,21 +1,38 @@
 class ValutatradeError(Exception):
-    """ Базовое исключение для пользовательских исключений """
-    pass
+    """ 
+    Базовое исключение для пользовательских исключений.
+
+    Текст сообщения формируется лениво в __str__: только тогда, 
+    когда исключение действительно выводится пользователю или в лог.
+    """
+    __slots__ = ()
+    message = ''
+
+    def __str__(self):
+        return self.message
 
 class NoContentError(ValutatradeError):
     """ Исключение, возникающее при отсутствии контента в файле / его части """
+    __slots__ = ('filepath',)
+
     def __init__(self, filepath):
         self.filepath = filepath
-        message = ((f'Не удалось загрузить контент из файла {filepath}.\n'
-                   'Возможно, запрашиваемая информация отсутствует.'))
-        super().__init__(message)
+        super().__init__(filepath)
+
+    def __str__(self):
+        return (f'Не удалось загрузить контент из файла {self.filepath}.\n'
+                'Возможно, запрашиваемая информация отсутствует.')
 
 class CurrencyNotFoundError(ValutatradeError):
     """ Исключение, возникающее при отсутствии валюты в реестре валют """
+    __slots__ = ('code',)
+
     def __init__(self, code:str):
         self.code = code 
-        message = f"Валюта с кодом {self.code} отсутствует в реестре валют."
-        super().__init__(message)
+        super().__init__(code)
+
+    def __str__(self):
+        return f"Валюта с кодом {self.code} отсутствует в реестре валют."
 
 class InsufficientFundsError(ValutatradeError):
     """ 
@@ -27,13 +44,17 @@ class InsufficientFundsError(ValutatradeError):
         required:float - необходимо средств для проведения операции
         code:str - код валюты, которой проводится операция
     """
+    __slots__ = ('available', 'code', 'required')
+
     def __init__(self, available:float, code:str, required:float):
         self.available = available
         self.code = code 
         self.required = required
-        message = f"Недостаточно средств: доступно {self.available}\
+        super().__init__(available, code, required)
+
+    def __str__(self):
+        return f"Недостаточно средств: доступно {self.available}\
  {self.code}, требуется {self.required:.2f} {self.code}"
-        super().__init__(message)
 
 class ApiRequestError(ValutatradeError):
     """
@@ -42,84 +63,115 @@ class ApiRequestError(ValutatradeError):
     Аргументы:
         reason:str - причина ошибки
     """
+    __slots__ = ('reason',)
+
     def __init__(self, reason:str):
         self.reason = reason
-        message = f"Ошибка при обращении к внешнему API: {self.reason}"
-        super().__init__(message)
+        super().__init__(reason)
+
+    def __str__(self):
+        return f"Ошибка при обращении к внешнему API: {self.reason}"
 
 class UsernameAlreadyTakenError(ValutatradeError):
     """
     Исключение, возникающее, если при регистрации имя пользователя уже занято
     """
+    __slots__ = ('username',)
+
     def __init__(self, username:str):
         self.username = username
-        message = f"Имя пользователя '{self.username}' занято."
-        super().__init__(message)
+        super().__init__(username)
+
+    def __str__(self):
+        return f"Имя пользователя '{self.username}' занято."
 
 class UserNotFoundError(ValutatradeError):
     """
     Исключение, возникающее, если не был найден в базе данных заданный пользователь.
     """
+    __slots__ = ('username',)
+
     def __init__(self, username:str):
         self.username = username 
-        message = f"Пользователь с именем '{self.username}' не был найден."
-        super().__init__(message)
+        super().__init__(username)
+
+    def __str__(self):
+        return f"Пользователь с именем '{self.username}' не был найден."
 
 class ShortPasswordError(ValutatradeError):
     """
     Исключение, возникающее при возникновении попытки 
     создать слишком короткий пароль.
     """
-    def __init__(self):
-        super().__init__("Пароль должен быть не короче 4-х символов.")
+    __slots__ = ()
+    message = "Пароль должен быть не короче 4-х символов."
 
 class WrongPasswordError(ValutatradeError):
     """
     Исключение, возникающее при неправильно введенном пароле 
     при входе в систему.
     """
-    def __init__(self):
-        super().__init__("Введен неверный пароль.")
+    __slots__ = ()
+    message = "Введен неверный пароль."
 
 class UserUnlogedError(ValutatradeError):
     """
     Исключение, возникающее, если пользователь не залогинен.
     """
-    def __init__(self):
-        super().__init__("Необходимо сначала войти в систему.")
+    __slots__ = ()
+    message = "Необходимо сначала войти в систему."
 
 class RateUnavailableError(ValutatradeError):
     """
     Исключение, возникающее при ошибке получения курса
     """
+    __slots__ = ('currency_from', 'currency_to', 'extra_info')
+
     def __init__(self, 
                  currency_from:str = None, 
                  currency_to:str = None, 
                  extra_info:str=None
                 ):
+        self.currency_from = currency_from
+        self.currency_to = currency_to
+        self.extra_info = extra_info
+        super().__init__(currency_from, currency_to, extra_info)
+
+    def __str__(self):
         message = 'Ошибка получения курса'
-        if currency_from and currency_to:
-            message += f" для {currency_from}->{currency_to}. "
-        if extra_info:
-            message += extra_info
-        super().__init__(message)
+        if self.currency_from and self.currency_to:
+            message += f" для {self.currency_from}->{self.currency_to}. "
+        if self.extra_info:
+            message += self.extra_info
+        return message
 
 class CommandNotAllowedError(ValutatradeError):
     """
     Исключение, возникающее, если пользователь вводит неподдерживаемую команду
     """
+    __slots__ = ('command',)
+
     def __init__(self, command:str):
-        super().__init__(f"Команда {command} не поддерживается в приложении.")
+        self.command = command
+        super().__init__(command)
+
+    def __str__(self):
+        return f"Команда {self.command} не поддерживается в приложении."
 
 class ArgumentsError(ValutatradeError):
     """
     Исключение, возникающее при введении неверных агрументов команды
     """
+    __slots__ = ('command', 'prompt')
+
     def __init__(self, command:str, prompt:str=None):
-        if prompt:
-            message = f"Неверный ввод команды {command}.\
- Попробуйте снова: {prompt}"
-        else:
-            message = f"Неверный ввод команды {command}.\
+        self.command = command
+        self.prompt = prompt
+        super().__init__(command, prompt)
+
+    def __str__(self):
+        if self.prompt:
+            return f"Неверный ввод команды {self.command}.\
+ Попробуйте снова: {self.prompt}"
+        return f"Неверный ввод команды {self.command}.\
  Воспользуйтесь командой help и попробуйте снова."
-        super().__init__(message)
\ No newline at end of file
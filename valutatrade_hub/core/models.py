@@ -2,24 +2,77 @@
 
 import datetime
 import hashlib
+import hmac
+import math
 import uuid
+from types import MappingProxyType
 
 from valutatrade_hub.core.exceptions import InsufficientFundsError, RateUnavailableError
 
+# Курсы по умолчанию для get_total_value (если курсы не переданы явно).
+# Константа модуля: не изменять
+_DEFAULT_RATES = {
+    "EUR_USD": 1.1587,
+    "BTC_USD": 59337.21,
+    "RUB_USD": 0.01237,
+    "ETH_USD": 3720.00,
+    "USD_USD": 1.0
+}
+# Таблицы курсов по умолчанию по коду валюты: базовая валюта -> {код: курс}
+_DEFAULT_RATE_TABLES = {}
+
+# Сообщения об ошибках портфеля (форматируются только при ошибке)
+_ERR_WALLET_EXISTS = 'Кошелек с валютой {} уже есть в портфеле.'
+_ERR_WALLET_MISSING = 'Кошелька с валютой {} нет в портфеле.'
+
+# Масштаб баланса кошелька: 1 единица = 1e-8 валюты (как сатоши у BTC)
+_BALANCE_SCALE = 10**8
+
+# Параметры scrypt для хеширования паролей (~16 МБ памяти на одно хеширование)
+SCRYPT_PARAMS = {'n': 2**14, 'r': 8, 'p': 1}
+
 
 class User:
     """ Класс пользователя """
+    __slots__ = (
+        '_user_id',
+        '_username',
+        '_auth',
+        '_registration_date',
+        '_hash_params'
+    )
 
+    # HOT: compute-bound - время уходит на ядро scrypt/SHA-256 в C,
+    # а не на интерпретатор; структура данных здесь на скорость не влияет
     @staticmethod
-    def _hash_password(password: str, salt: str) -> str:
-        """
-        Генерирует односторонний псевдо-хеш пароля, используя соль
+    def _hash_password(password: str, salt: bytes, hash_params: dict = None) -> bytes:
         """
-        if not isinstance(password, str) or not isinstance(salt, str):
-            raise TypeError('Пароль и соль должны быть строками.')
-        salted_password = (password + salt).encode('utf-8')
-        return hashlib.sha256(salted_password).hexdigest()
+        Генерирует односторонний хеш пароля (32 байта), используя соль (16 байт).
 
+        Если переданы параметры hash_params - используется memory-hard KDF scrypt.
+        Без параметров - устаревшая схема sha256(password + salt.hex()), которая
+        сохранена для проверки паролей пользователей,
+        зарегистрированных до перехода на scrypt.
+        """
+        if not isinstance(password, str):
+            raise TypeError('Пароль должен быть строкой.')
+        if not isinstance(salt, bytes):
+            raise TypeError('Соль должна быть представлена байтами.')
+        if hash_params:
+            return hashlib.scrypt(
+                password.encode('utf-8'),
+                salt=salt,
+                n=hash_params['n'],
+                r=hash_params['r'],
+                p=hash_params['p'],
+                dklen=32
+            )
+        # Пароль и соль подаются в хешер по отдельности:
+        # без промежуточной строки password + salt.
+        # Устаревшие хеши считались от hex-записи соли
+        hasher = hashlib.sha256(password.encode('utf-8'))
+        hasher.update(salt.hex().encode('ascii'))
+        return hasher.digest()
 
     def __init__(
             self, 
@@ -28,7 +81,8 @@ class User:
             password: str = None,
             hashed_password: str = None, 
             salt: str = None, 
-            registration_date: datetime = None
+            registration_date: datetime = None,
+            hash_params: dict = None
         ): 
         """
         Конструктор класса User
@@ -37,8 +91,13 @@ class User:
         username: имя пользователя
         password: пароль в открытом виде (если пользователь еще не зарегистрирован)
         hashed_password: пароль в зашифрованном виде
-        salt: уникальная соль для пользователя
+        salt: уникальная соль для пользователя (hex-строка, как в JSON);
+            внутри хранится в виде 16 байт
         registration_date: дата регистрации пользователя
+        hash_params: параметры scrypt, с которыми получен hashed_password
+            (None - пароль захеширован устаревшей схемой sha256)
+
+        Соль и хеш хранятся одним блоком байт _auth: 16 байт соли + 32 байта хеша.
         """
         if not isinstance(user_id, int) or user_id <= 0:
             raise ValueError\
@@ -47,14 +106,22 @@ class User:
         self._username = username 
 
         if password and not hashed_password:
-            self._salt = uuid.uuid4().hex
-            self._hashed_password = self._hash_password(password, self._salt)
+            new_salt = uuid.uuid4().bytes
+            self._hash_params = dict(SCRYPT_PARAMS)
+            self._auth = new_salt + self._hash_password(
+                password, new_salt, self._hash_params
+            )
         elif hashed_password and salt:
             if not isinstance(hashed_password, str) or not isinstance(salt, str):
                 raise TypeError\
                 ('Хешированный пароль и соль должны быть представлены строками.')
-            self._salt = salt 
-            self._hashed_password = hashed_password
+            salt_bytes = bytes.fromhex(salt)
+            hash_bytes = bytes.fromhex(hashed_password)
+            if len(salt_bytes) != 16 or len(hash_bytes) != 32:
+                raise ValueError\
+                ('Соль должна занимать 16 байт, а хеш пароля - 32 байта.')
+            self._auth = salt_bytes + hash_bytes
+            self._hash_params = hash_params
         else:
             raise ValueError\
             ('Необходимо указать либо открытый пароль (при регистрации),\
@@ -78,16 +145,22 @@ class User:
     
     @property
     def hashed_password(self):
-        return self._hashed_password
+        """ Хеш пароля в hex-записи (формат хранения в JSON) """
+        return self._auth[16:].hex()
     
     @property
     def salt(self):
-        return self._salt 
+        """ Соль в hex-записи (формат хранения в JSON) """
+        return self._auth[:16].hex()
     
     @property
     def registration_date(self):
         return self._registration_date
     
+    @property
+    def hash_params(self):
+        return self._hash_params
+    
     # Сеттеры
     @username.setter
     def username(self, value: str):
@@ -111,9 +184,11 @@ class User:
         """
         if len(new_password.strip()) < 4:
             raise ValueError('Пароль должен быть не короче 4 символов.')
-        new_salt = uuid.uuid4().hex
-        self._salt = new_salt 
-        self._hashed_password = self._hash_password(new_password, new_salt)
+        new_salt = uuid.uuid4().bytes
+        self._hash_params = dict(SCRYPT_PARAMS)
+        self._auth = new_salt + self._hash_password(
+            new_password, new_salt, self._hash_params
+        )
 
     def verify_password(self, password):
         """
@@ -122,16 +197,21 @@ class User:
         """
         if not isinstance(password, str):
             return False
-        password_to_verify = self._hash_password(password, self._salt)
-        return password_to_verify == self._hashed_password
+        auth = self._auth
+        password_to_verify = self._hash_password(
+            password, auth[:16], self._hash_params
+        )
+        # Сравнение за постоянное время: не раскрывает длину совпавшего префикса
+        return hmac.compare_digest(password_to_verify, auth[16:])
     
     def to_dict(self):
         """ Конвертирует пользователя в словарь для сохранения в файл JSON """
         return {
             "user_id": self._user_id,
             "username": self._username,
-            "hashed_password": self._hashed_password,
-            "salt": self._salt,
+            "hashed_password": self.hashed_password,
+            "salt": self.salt,
+            "hash_params": self._hash_params,
             "registration_date": self._registration_date.isoformat()
         }
     
@@ -146,14 +226,36 @@ class User:
             hashed_password = data.get('hashed_password'),
             salt = data.get('salt'),
             registration_date = datetime.datetime\
-                .fromisoformat(data.get('registration_date'))
+                .fromisoformat(data.get('registration_date')),
+            hash_params = data.get('hash_params')
         )
 
+    @classmethod
+    def from_dicts(cls, records: list[dict]) -> list['User']:
+        """
+        Создает список пользователей из списка словарей (массовая загрузка).
+        Разбор дат и конструктор связываются в локальные переменные один раз.
+        """
+        fromisoformat = datetime.datetime.fromisoformat
+        return [
+            cls(
+                user_id = data.get('user_id'),
+                username = data.get('username'),
+                hashed_password = data.get('hashed_password'),
+                salt = data.get('salt'),
+                registration_date = fromisoformat(data.get('registration_date')),
+                hash_params = data.get('hash_params')
+            )
+            for data in records
+        ]
+
 
 class Wallet:
     """
     Класс кошелька пользователя для одной конкретной валюты
     """
+    __slots__ = ('currency_code', '_units')
+
     def __init__(
             self, 
             currency_code: str,
@@ -168,56 +270,73 @@ class Wallet:
         if not isinstance(currency_code, str):
             raise TypeError('Код валюты должен быть представлен строкой.')
         self.currency_code = currency_code.upper()
-        self._balance = balance
+        # Баланс хранится целым числом минимальных единиц (1e-8):
+        # пополнения и списания точны и не накапливают ошибку float.
+        # Значение проверяется сеттером balance
+        self.balance = balance
     
     def deposit(self, amount: float):
         """ Метод для пополнения баланса """
-        if not isinstance(amount, (int, float)):
+        # Быстрый путь: точная проверка типа float, isinstance - только для int
+        if type(amount) is not float and not isinstance(amount, int):
             raise TypeError('Сумма пополнения баланса должна быть числом.')
+        if not math.isfinite(amount):
+            raise ValueError('Сумма пополнения баланса должна быть конечным числом.')
         if amount <= 0:
             raise ValueError('Сумма пополнения баланса должна быть больше 0.')
-        self._balance += float(amount) 
+        units = round(amount * _BALANCE_SCALE)
+        if not units:
+            # Сумма меньше минимальной единицы округлилась бы до нуля
+            raise ValueError('Сумма пополнения баланса должна быть не меньше 1e-8.')
+        self._units += units
     
     def withdraw(self, amount: float):
         """ Метод для снятия средств, если позволяет баланс """
-        if not isinstance(amount, (int, float)):
+        if type(amount) is not float and not isinstance(amount, int):
             raise TypeError('Сумма снятия средств должна быть числом.')
+        if not math.isfinite(amount):
+            raise ValueError('Сумма списания должна быть конечным числом.')
         if amount <= 0:
             raise ValueError('Сумма списания должна быть больше 0.')
-        if amount > self._balance:
+        units = round(amount * _BALANCE_SCALE)
+        if not units:
+            raise ValueError('Сумма списания должна быть не меньше 1e-8.')
+        if units > self._units:
             raise InsufficientFundsError(
-                available=self._balance, 
+                available=self.balance, 
                 code=self.currency_code,
                 required=amount
             )
-        self._balance -= float(amount)
-        return self._balance
+        self._units -= units
+        return self.balance
 
     def get_balance_info(self):
         """ Вывод информации о текущем балансе """
         return {
             'currency_code': self.currency_code,
-            'balance': self._balance
+            'balance': self.balance
         }
     
     # Геттеры
     @property 
     def balance(self):
-        return self._balance
+        return self._units / _BALANCE_SCALE
     
     @balance.setter 
     def balance(self, amount: float):
         if not isinstance(amount, (int, float)):
             raise TypeError('Баланс должен быть числом.')
+        if not math.isfinite(amount):
+            raise ValueError('Баланс должен быть конечным числом.')
         if amount < 0:
             raise ValueError('Баланс не может быть отрицательным.')
-        self._balance = float(amount) 
+        self._units = round(amount * _BALANCE_SCALE)
 
     def to_dict(self):
         """ Конвертирует кошелек в словарь """
         return {
             "currency_code": self.currency_code,
-            "balance": self._balance
+            "balance": self.balance
         }
     
     @classmethod 
@@ -233,6 +352,8 @@ class Portfolio:
     """
     Класс управления всеми кошельками одного пользователя
     """
+    __slots__ = ('_user_id', '_wallets', '_wallets_view')
+
     def __init__(
             self, 
             user_id: int, 
@@ -248,7 +369,11 @@ class Portfolio:
             raise ValueError('Идентификатор пользователя должен быть целым числом.')
         self._user_id = user_id
         
-        if wallets:
+        # Явная проверка на None: пустой словарь проходит ту же валидацию,
+        # а ложные значения другого типа ([] и т.п.) отклоняются
+        if wallets is None:
+            self._wallets = {}
+        else:
             if not isinstance(wallets, dict):
                 raise TypeError('Кошельки пользователя должны передаваться в словаре.')
             if not all(isinstance(code, str) for code in wallets):
@@ -257,8 +382,8 @@ class Portfolio:
                 raise TypeError\
                 ('Значения в словаре кошельков должны быть объектами Wallet кошелька.')
             self._wallets = wallets 
-        else:
-            self._wallets = {}
+        # Представление только для чтения создается один раз
+        self._wallets_view = MappingProxyType(self._wallets)
     
     # Геттеры
     @property 
@@ -267,7 +392,11 @@ class Portfolio:
     
     @property
     def wallet(self):
-        return self._wallets.copy()
+        """
+        Кошельки в виде словаря только для чтения (без копирования).
+        Для изменяемой копии используйте dict(portfolio.wallet).
+        """
+        return self._wallets_view
     
     def add_currency(self, currency_code: str, initial_balance: float = 0.0):
         """
@@ -275,9 +404,11 @@ class Portfolio:
         """
         if not isinstance(currency_code, str):
             raise TypeError('Код валюты должен быть представлен строкой.')
-        if currency_code in self._wallets:
-            raise ValueError(f'Кошелек с валютой {currency_code} уже есть в портфеле.')
+        # Код приводится к верхнему регистру до проверки:
+        # иначе 'usd' не совпадал бы с существующим кошельком 'USD'
         currency_code = currency_code.upper()
+        if currency_code in self._wallets:
+            raise ValueError(_ERR_WALLET_EXISTS.format(currency_code))
         new_wallet = Wallet(currency_code, initial_balance)
         self._wallets[currency_code] = new_wallet
         return new_wallet
@@ -289,11 +420,13 @@ class Portfolio:
         if not isinstance(currency_code, str):
             raise TypeError('Код валюты должен быть строкой')
         currency_code = currency_code.upper()
-        if currency_code in self._wallets:
-            return self._wallets.get(currency_code)
-        else:
-            raise ValueError(f'Кошелька с валютой {currency_code} нет в портфеле.')
+        wallet = self._wallets.get(currency_code)
+        if wallet is None:
+            raise ValueError(_ERR_WALLET_MISSING.format(currency_code))
+        return wallet
 
+    # HOT: memory-bound - обход словаря кошельков и поиск курсов;
+    # выигрыш дают раскладка данных и меньше поисков, а не арифметика
     def get_total_value(
             self, 
             base_currency='USD', 
@@ -305,31 +438,40 @@ class Portfolio:
         if not isinstance(base_currency, str):
             raise TypeError('Код валюты должен быть строкой.')
         base_currency = base_currency.upper()
+        if exchange_rates is None:
+            # Курсы по умолчанию неизменны: таблица строится один раз на валюту
+            rate_by_code = _DEFAULT_RATE_TABLES.get(base_currency)
+            if rate_by_code is None:
+                rate_by_code = Portfolio._rates_by_code(_DEFAULT_RATES, base_currency)
+                _DEFAULT_RATE_TABLES[base_currency] = rate_by_code
+        else:
+            rate_by_code = Portfolio._rates_by_code(exchange_rates, base_currency)
         total_balance = 0
         for currency, wallet in self._wallets.items():
-            if currency == base_currency:
-                balance = wallet.balance
-                if balance:
-                    total_balance += balance
-            else:
-                if exchange_rates is None:
-                    exchange_rates = {
-                        "EUR_USD": 1.1587,
-                        "BTC_USD": 59337.21,
-                        "RUB_USD": 0.01237,
-                        "ETH_USD": 3720.00,
-                        "USD_USD": 1.0
-                    }
-                rate_key = f'{currency}_{base_currency}'
-                if rate_key not in exchange_rates:
-                    raise RateUnavailableError((f'Курс для валюты {currency} '
-                    f'относительно {base_currency} не найден.'))
-                currency_rate = exchange_rates.get(rate_key)
-                currency_balance = wallet.balance
-                balance = currency_balance * currency_rate
-                total_balance += balance
+            rate = rate_by_code.get(currency)
+            if rate is None:
+                raise RateUnavailableError(currency, base_currency)
+            total_balance += wallet.balance * rate
         return total_balance
-    
+
+    @staticmethod
+    def _rates_by_code(
+            exchange_rates: dict[str, float],
+            base_currency: str) -> dict[str, float]:
+        """
+        Строит таблицу курсов к базовой валюте с ключом по коду валюты:
+        {'BTC_USD': 59337.21} -> {'BTC': 59337.21, 'USD': 1.0}.
+        Во внутреннем цикле не приходится собирать ключ f'{code}_{base}'.
+        """
+        suffix = '_' + base_currency
+        cut = -len(suffix)
+        rate_by_code = {
+            pair[:cut]: rate
+            for pair, rate in exchange_rates.items() if pair.endswith(suffix)
+        }
+        rate_by_code[base_currency] = 1.0
+        return rate_by_code
+
     def to_dict(self):
         """ Конвертирует портфель в словарь """
         return {
@@ -1,5 +1,9 @@
 # Модуль содержит бизнес-логику приложения
-from datetime import datetime, timedelta, timezone
+import math
+import time
+from functools import cached_property
+from heapq import nlargest
+from operator import itemgetter
 
 from valutatrade_hub.core.currencies import get_currency
 from valutatrade_hub.core.exceptions import (
@@ -7,16 +11,65 @@ from valutatrade_hub.core.exceptions import (
     ShortPasswordError,
     UsernameAlreadyTakenError,
     UserNotFoundError,
-    UserUnlogedError,
     WrongPasswordError,
 )
 from valutatrade_hub.core.models import Portfolio, User
-from valutatrade_hub.decorators import log_action
+from valutatrade_hub.decorators import log_action, require_login
 from valutatrade_hub.infra.database import DatabaseManager, get_database
 from valutatrade_hub.infra.settings import SettingsLoader, get_settings
 from valutatrade_hub.parser_service.config import ParserConfig
 from valutatrade_hub.parser_service.updater import RatesUpdater
 
+# Допустимые типы количества валюты (кортеж собирается один раз)
+_NUMERIC = (int, float)
+# Минимальное количество валюты: одна единица баланса кошелька (1e-8),
+# меньшие суммы округлились бы в кошельке до нуля
+_MIN_AMOUNT = 1e-8
+_MIN_AMOUNT_ERROR = 'Количество валюты должно быть не меньше 0.00000001.'
+
+
+# Встроенные и глобальные имена передаются аргументами по умолчанию:
+# обращение к ним становится локальным (LOAD_FAST), а не глобальным
+def _validate_amount(
+        amount,
+        type_message:str = "Количество покупаемой валюты должно быть числом.",
+        value_message:str = ("Количество покупаемой валюты "
+                             "должно быть положительным числом."),
+        _isinstance=isinstance
+    ):
+    """
+    Проверяет, что количество валюты - конечное положительное число,
+    не меньшее минимальной единицы баланса кошелька.
+
+    Выбрасывает:
+        TypeError,
+        ValueError
+    """
+    # Быстрый путь: точная проверка типа float, isinstance - для остальных
+    if type(amount) is not float and not _isinstance(amount, _NUMERIC):
+        raise TypeError(type_message)
+    if amount <= 0 or not math.isfinite(amount):
+        raise ValueError(value_message)
+    if amount < _MIN_AMOUNT:
+        raise ValueError(_MIN_AMOUNT_ERROR)
+
+
+def _validate_currency_code(
+        currency:str,
+        _isinstance=isinstance,
+        _get_currency=get_currency
+    ):
+    """
+    Проверяет, что код валюты - строка и валюта есть в реестре.
+
+    Выбрасывает:
+        TypeError,
+        CurrencyNotFoundError
+    """
+    if not _isinstance(currency, str):
+        raise TypeError("Код валюты должен быть строкой.")
+    _get_currency(currency.strip())
+
 
 class Session:
     """
@@ -24,6 +77,9 @@ class Session:
     """
     def __init__(self):
         self.current_user = None 
+        # Портфель текущего пользователя и записи базы, из которых он загружен
+        self.current_portfolio = None
+        self._portfolio_source = None
     
     def is_logged_in(self):
         """ Проверить, залогинен ли пользователь """
@@ -32,14 +88,32 @@ class Session:
     def login(self, user:User):
         """ Залогинить пользователя """
         self.current_user = user 
+        self.current_portfolio = None
     
     def logout(self):
         """ Разлогинить пользователя """
         self.current_user = None 
+        self.current_portfolio = None
     
     def get_current_user(self):
         """ Получить текущего пользователя """
         return self.current_user 
+
+    def get_portfolio(self, database:DatabaseManager):
+        """ 
+        Получить портфель текущего пользователя.
+        Портфель загружается из базы один раз и переиспользуется 
+        следующими командами, пока файл портфелей не изменится 
+        (другим процессом или после неудачного сохранения): 
+        тогда портфель загружается заново, а устаревшая копия 
+        не перезаписывает чужие изменения.
+        """
+        source = database.get_portfolio_records()
+        if self.current_portfolio is None or source is not self._portfolio_source:
+            self.current_portfolio = database\
+                .find_portfolio_by_user_id(self.current_user.user_id)
+            self._portfolio_source = source
+        return self.current_portfolio
     
 
 class UserCommands:
@@ -88,12 +162,11 @@ class UserCommands:
         """
         if not username or not username.strip():
             raise ValueError('Имя пользователя не должно быть пустым.')
-        if not isinstance(initial_usd_amount, float|int):
-            raise TypeError\
-            ("Начальная сумма пополнения USD кошелька должна быть числом.")
-        if initial_usd_amount <= 0:
-            raise ValueError(("Начальная сумма пополнения USD "
-                             "кошелька должна быть положительным числом."))
+        _validate_amount(
+            initial_usd_amount,
+            "Начальная сумма пополнения USD кошелька должна быть числом.",
+            "Начальная сумма пополнения USD кошелька должна быть положительным числом."
+        )
 
         # Проверка длины пароля
         if len(password) < 4:
@@ -104,20 +177,20 @@ class UserCommands:
             raise UsernameAlreadyTakenError(username)
         
         # Генерация нового id
-        users = self.database.load_users()
-        new_id = max([user.user_id for user in users], default=0) + 1
+        new_id = self.database.next_user_id()
 
-        # Создание нового объекта пользователя
+        # Создание нового объекта пользователя (список берется из индекса,
+        # файл пользователей повторно не читается)
         new_user = User(new_id, username, password)
+        users = list(self.database.get_users_index().values())
         users.append(new_user)
-        self.database.save_users(users)
 
         # Создание нового портфолио с созданием и пополнением USD-кошелька
-        portfolios = self.database.load_portfolios()
         new_portfolio = Portfolio(new_id)
         new_portfolio.add_currency('USD', initial_usd_amount)
-        portfolios.append(new_portfolio)
-        self.database.save_portfolios(portfolios)
+
+        # Пользователь и портфель сохраняются одной фиксацией
+        self.database.commit_bundle(users=users, portfolio=new_portfolio)
 
         return (f"Пользователь с именем {username} "
             f"успешно зарегистрирован под id={new_id}."
@@ -142,11 +215,11 @@ class UserCommands:
         """
         if not username or not username.strip():
             raise ValueError("Имя пользователя не должно быть пустым.")
-        if not self.database.find_user_by_username(username):
+        user = self.database.find_user_by_username(username)
+        if user is None:
             raise UserNotFoundError(username)
         
-        user = self.database.find_user_by_username(username)
-        if user.verify_password(password) is False:
+        if not user.verify_password(password):
             raise WrongPasswordError()
         
         self.session.login(user)
@@ -175,6 +248,7 @@ class PortfolioCommands:
         else:
             self.database = get_database()
     
+    @require_login
     def show_portfolio(self, base:str = 'USD'):
         """
         Показать все кошельки и итоговую стоимость в базовой валюте (по умолчанию USD).
@@ -188,31 +262,32 @@ class PortfolioCommands:
         Выбрасывает:
             UserUnlogedError
         """
-        if not self.session.is_logged_in():
-            raise UserUnlogedError()
         if base != 'USD':
             base = base.upper()
             # Валидация существования валюты:
             get_currency(base)
-        user = self.session.get_current_user()
-        user_id = user.user_id
-        portfolio = self.database.find_portfolio_by_user_id(user_id)
+        user = self.session.current_user
+        portfolio = self.session.get_portfolio(self.database)
 
         if not portfolio._wallets:
             return (f"Портфель пользователя {user.username} пуст. "
                     "Используйте команду 'buy' для покупки валюты.")
         result = [f"Портфель пользователя {user.username} (база: {base}):"]
 
+        # Курсы всех валют портфеля к базовой - одним запросом
+        rates = self.database.get_rates(
+            [code for code in portfolio._wallets if code != base], base
+        )
         total_balance = 0.0
         for code, wallet in portfolio._wallets.items():
             balance = wallet.balance 
             # в базовой валюте:
             if code == base:
-                balance_base = wallet.balance 
+                balance_base = balance 
             else:
-                rate = self.database.get_rate(code, base)
+                rate = rates[code]
                 if rate:
-                    balance_base = wallet.balance * rate 
+                    balance_base = balance * rate 
                 else:
                     result.append(f" {code}: {balance:.2f} -> курс недоступен")
                     continue 
@@ -225,6 +300,7 @@ class PortfolioCommands:
         return "\n".join(result)
     
     @log_action(action='BUY', verbose=True)
+    @require_login
     def buy(self, currency:str, amount:float|int):
         """
         Метод для покупки валют. Покупка других валют возможна только за USD.
@@ -243,31 +319,19 @@ class PortfolioCommands:
             RateUnavailableError,
             InsufficientFundsError
         """
-        # Проверка login
-        if not self.session.is_logged_in():
-            raise UserUnlogedError()
-        
         # Валидация кода покупаемой валюты
-        if not isinstance(currency, str):
-            raise TypeError("Код валюты должен быть строкой.")
-        get_currency(currency.strip())
+        _validate_currency_code(currency)
 
         # Валидация количества покупаемой валюты (amount > 0)
-        if not isinstance(amount, float|int):
-            raise TypeError("Количество покупаемой валюты должно быть числом.")
-        if amount <= 0:
-            raise ValueError\
-            ("Количество покупаемой валюты должно быть положительным числом.")
+        _validate_amount(amount)
         
-        # Проверка наличия кошелька и его создание в случае отсутствия
-        user = self.session.get_current_user()
-        user_id = user.user_id 
-        portfolio = self.database.find_portfolio_by_user_id(user_id)
+        # Поиск кошелька (создается только после успешного списания USD:
+        # портфель сессии не должен меняться при неудачной покупке)
+        portfolio = self.session.get_portfolio(self.database)
         try:
             wallet = portfolio.get_wallet(currency)
         except ValueError:
-            # Создание нового кошелька
-            wallet = portfolio.add_currency(currency)
+            wallet = None
         
         # Получаем курс currency_USD:
         rate = self.database.get_rate(currency, 'USD')
@@ -275,17 +339,25 @@ class PortfolioCommands:
             usd_price = rate * amount 
         else:
             raise RateUnavailableError(currency, 'USD')
+        if usd_price < _MIN_AMOUNT:
+            raise ValueError('Стоимость покупки меньше 0.00000001 USD. '
+                             'Увеличьте количество покупаемой валюты.')
         
-        usd_old_balance = portfolio.get_wallet('USD').balance
-        currency_old_balance = wallet.balance
+        usd_wallet = portfolio.get_wallet('USD')
+        usd_old_balance = usd_wallet.balance
+        currency_old_balance = wallet.balance if wallet else 0.0
 
         # Снимаем стоимость валюты в долларах с USD-кошелька.
-        portfolio.get_wallet('USD').withdraw(usd_price)
-        usd_new_balance = portfolio.get_wallet('USD').balance
+        usd_wallet.withdraw(usd_price)
+        usd_new_balance = usd_wallet.balance
+
+        # Создание нового кошелька
+        if wallet is None:
+            wallet = portfolio.add_currency(currency)
 
         # Кладем на счет покупаемой валюты купленную сумму
-        portfolio.get_wallet(currency).balance += amount
-        currency_new_balance = portfolio.get_wallet(currency).balance
+        wallet.deposit(amount)
+        currency_new_balance = wallet.balance
 
         # Сохраняем портфель с изменениями
         self.database.save_portfolio(portfolio)
@@ -303,6 +375,7 @@ class PortfolioCommands:
         return result 
     
     @log_action(action='BUY_USD', verbose=True)
+    @require_login
     def buy_usd(self, amount:float):
         """
         Метод для покупки USD за деньги из внешнего источника (имитация)
@@ -310,23 +383,15 @@ class PortfolioCommands:
         Аргументы:
             amount:float - количество покупаемых USD
         """
-        # Проверка на выполненный вход в систему
-        if not self.session.is_logged_in():
-            raise UserUnlogedError()
-        
         # Валидация количества покупаемой валюты (amount > 0)
-        if not isinstance(amount, float|int):
-            raise TypeError("Количество покупаемой валюты должно быть числом.")
-        if amount <= 0:
-            raise ValueError\
-            ("Количество покупаемой валюты должно быть положительным числом.")
+        _validate_amount(amount)
         
         # Перевод на USD счет указанное количество долларов:
-        user_id = self.session.get_current_user().user_id 
-        portfolio = self.database.find_portfolio_by_user_id(user_id)
-        usd_old_balance = portfolio.get_wallet('USD').balance 
-        portfolio.get_wallet('USD').deposit(amount)
-        usd_new_balance = portfolio.get_wallet('USD').balance 
+        portfolio = self.session.get_portfolio(self.database)
+        usd_wallet = portfolio.get_wallet('USD')
+        usd_old_balance = usd_wallet.balance 
+        usd_wallet.deposit(amount)
+        usd_new_balance = usd_wallet.balance 
         self.database.save_portfolio(portfolio)
 
         return (f"Покупка выполнена: {amount} USD"
@@ -334,6 +399,7 @@ class PortfolioCommands:
                 f"USD: было {usd_old_balance:.2f} -> стало {usd_new_balance:.2f}")
     
     @log_action(action='SELL', verbose=True)
+    @require_login
     def sell(self, currency:str, amount:float|int):
         """
         Метод для продажи валют. Возможна продажа всех валют, 
@@ -355,28 +421,17 @@ class PortfolioCommands:
             RateUnavailableError,
             InsufficientFundsError
         """
-        # Проверка на выполненный вход в систему
-        if not self.session.is_logged_in():
-            raise UserUnlogedError()
-
-        # Валидация кода покупаемой валюты
-        if not isinstance(currency, str):
-            raise TypeError("Код валюты должен быть строкой.")
+        # Валидация кода продаваемой валюты
         if currency == 'USD':
             raise ValueError('Продажа USD не допускается.')
-        get_currency(currency.strip())
+        _validate_currency_code(currency)
 
         # Валидация количества покупаемой валюты (amount > 0)
-        if not isinstance(amount, float|int):
-            raise TypeError("Количество покупаемой валюты должно быть числом.")
-        if amount <= 0:
-            raise ValueError\
-            ("Количество покупаемой валюты должно быть положительным числом.")
+        _validate_amount(amount)
         
         # Проверка существования кошелька 
         # (при отсутствии - ValueError в методе get_wallet())
-        user_id = self.session.get_current_user().user_id 
-        portfolio = self.database.find_portfolio_by_user_id(user_id)
+        portfolio = self.session.get_portfolio(self.database)
         try:
             wallet = portfolio.get_wallet(currency)
         except ValueError as e:
@@ -388,18 +443,25 @@ class PortfolioCommands:
         rate = self.database.get_rate(currency, 'USD')
         if not rate:
             raise RateUnavailableError(currency, 'USD')
+        # Выручка проверяется до списания: портфель не меняется, 
+        # если ее нельзя зачислить на USD-кошелек
+        usd_revenue = rate * amount
+        if usd_revenue < _MIN_AMOUNT:
+            raise ValueError('Выручка от продажи меньше 0.00000001 USD. '
+                             'Увеличьте количество продаваемой валюты.')
         
+        usd_wallet = portfolio.get_wallet('USD')
         currency_old_balance = wallet.balance 
-        usd_old_balance = portfolio.get_wallet('USD').balance 
+        usd_old_balance = usd_wallet.balance 
 
         # Списание средств со счета продаваемой валюты
         # InsufficientFundsError, если недостаточно средств:
-        portfolio.get_wallet(currency).withdraw(amount) 
-        currency_new_balance = portfolio.get_wallet(currency).balance
+        wallet.withdraw(amount) 
+        currency_new_balance = wallet.balance
 
         # Кладем на счет USD цену за продаваемую валюту
-        portfolio.get_wallet('USD').deposit(rate * amount)
-        usd_new_balance = portfolio.get_wallet('USD').balance 
+        usd_wallet.deposit(usd_revenue)
+        usd_new_balance = usd_wallet.balance 
 
         # Сохраняем измененный портфель
         self.database.save_portfolio(portfolio)
@@ -411,18 +473,30 @@ class PortfolioCommands:
             f"\n{currency}: было {currency_old_balance:.4f} "
             f"-> стало {currency_new_balance:.4f}"
             f"\nUSD: было {usd_old_balance:.2f} -> стало {usd_new_balance:.2f}"
-            f"\nОценочная выручка: {rate * amount:.2f} USD"
+            f"\nОценочная выручка: {usd_revenue:.2f} USD"
         )
 
         return result 
     
 
 class RatesCommands:
-    def __init__(self):
-        self.database = DatabaseManager()
-        self.settings = SettingsLoader()
-        self.config = ParserConfig()
-        self.updater = RatesUpdater(self.config)
+    # Зависимости создаются лениво, при первом обращении:
+    # например, show_rates не использует updater вовсе
+    @cached_property
+    def database(self):
+        return DatabaseManager()
+
+    @cached_property
+    def settings(self):
+        return SettingsLoader()
+
+    @cached_property
+    def config(self):
+        return ParserConfig()
+
+    @cached_property
+    def updater(self):
+        return RatesUpdater(self.config)
 
     def get_rate(self, currency_from:str, currency_to:str):
         """
@@ -457,44 +531,47 @@ class RatesCommands:
         # иначе - запрашиваем у внешнего источника через Parser Service
         rates_data = self.database.load_rates()
         ttl = self.settings.get_rates_ttl() # ttl = 300 секунд
-        if not rates_data:
-            raise RateUnavailableError(
-                'Локальный кэш пуст. '
-                'Выполните update-rates, чтобы загрузить данные'
-            )
+        if not rates_data['rates']:
+            # load_rates всегда возвращает словарь: пуст ли кэш, видно по курсам
+            raise RateUnavailableError(extra_info=". Локальный кэш пуст. "
+                    "Выполните update-rates, чтобы загрузить данные.")
         updated_at = rates_data.get('last_refresh')
-        # Извлекаем курсы
-        pair_rate = self.database.get_rate(currency_from, currency_to)
-        if not pair_rate:
-            raise RateUnavailableError(
-                extra_info=f" В локальном кэше "
-                f"нет курса для пары {currency_from}_{currency_to}. "
-                "Обновите курсы командой update-rates, "
-                f"указав базой {currency_to} и попробуйте снова.")
-        reversed_pair_rate = 1 / pair_rate
-        # Проверяем, просрочены ли данные
-        updated_at_dt = datetime.fromisoformat(updated_at).replace(microsecond=0)
-        updated_display = updated_at.replace('Z', '').replace('T', ' ')
-        if datetime.now(timezone.utc) < updated_at_dt + timedelta(seconds=int(ttl)):
+        # Проверяем, просрочены ли данные (сравнение секунд эпохи)
+        updated_epoch = self.database.get_last_refresh_epoch(rates_data)
+        if updated_epoch is not None and time.time() < updated_epoch + int(ttl):
+            # Извлекаем курс из уже загруженных данных 
+            # (только для свежего кэша: при просрочке курс берется после обновления)
+            pair_rate = self.database.get_rate_from(
+                rates_data, currency_from, currency_to
+            )
+            if not pair_rate:
+                raise RateUnavailableError(
+                    extra_info=f" В локальном кэше "
+                    f"нет курса для пары {currency_from}_{currency_to}. "
+                    "Обновите курсы командой update-rates, "
+                    f"указав базой {currency_to} и попробуйте снова.")
+            reversed_pair_rate = 1 / pair_rate
+            updated_display = updated_at.replace('Z', '').replace('T', ' ')
             return (f"Курс {currency_from}->{currency_to}: {pair_rate:.6f} "
                     f"(обновлено: {updated_display})"
                     f"\nОбратный курс: {currency_to}->{currency_from}:"
                     f" {reversed_pair_rate:.6f}")
         else:
-            # данные просрочены: обновляем через RatesUpdater
-            self.updater.run_update()
-            # Извлекаем новые курсы
-            new_rates_data = self.database.load_rates()
-            if not new_rates_data:
-                raise RateUnavailableError(
-                    'Локальный кэш пуст. '
-                    'Выполните update-rates, чтобы загрузить данные'
-                )
+            # данные просрочены: обновляем через RatesUpdater.
+            # Свежие курсы берем из результата обновления, 
+            # не перечитывая файл (если курсов не получено - из кэша)
+            new_rates_data = self.updater.run_update() or self.database.load_rates()
             new_updated_at = new_rates_data.get('last_refresh')
-            new_rate = self.database.get_rate(currency_from, currency_to)
+            new_rate = self.database.get_rate_from(
+                new_rates_data, currency_from, currency_to
+            )
+            if not new_rate:
+                raise RateUnavailableError(currency_from, currency_to)
             if new_updated_at:
                 new_updated_at_display = new_updated_at\
                     .replace('T', ' ').replace('Z', '')
+            else:
+                new_updated_at_display = 'информация отсутствует'
             new_reversed_rate = 1/new_rate if new_rate > 0 else 0
             return (
                 f"Курс {currency_from}->{currency_to}: {new_rate:.6f} "
@@ -520,9 +597,16 @@ class RatesCommands:
             if top <= 0:
                 raise ValueError\
                     ('Количество криптовалют должно быть положительным')
+            # Запрошено больше, чем криптовалют всего: отказ до чтения кэша
+            crypto_count = len(self.config.CRYPTO_ID_MAP)
+            if top > crypto_count:
+                raise RateUnavailableError(
+                    extra_info=(f' Всего извлечено {crypto_count}.'
+                                f' Запрошено: {top}.')
+                    )
         # Загружаем курсы из кэша
         rates_data = self.database.load_rates()
-        if rates_data:
+        if rates_data['rates']:
             rates = rates_data.get('rates')
             last_updated_at = rates_data.get('last_refresh', 'информация отсутствует')
         else:
@@ -561,11 +645,9 @@ class RatesCommands:
                     f"\n- {pair}: {rate:.5f}")
         # ОБрабатываем сценарий с получением курсов для топ N криптовалют 
         if top is not None:
-            crypto_coins = list(self.config.CRYPTO_ID_MAP.keys())
             crypto_rates = []
-            for code in crypto_coins:
-                # Формируем пару
-                pair = f"{code}_{base}"
+            # Ключи пар 'КОД_BASE' берутся готовыми из конфигурации
+            for code, pair in self.config.crypto_pairs(base):
                 # Пробуем извлечь курс для пары
                 pair_rate = rates.get(pair)
                 if not pair_rate:
@@ -584,21 +666,11 @@ class RatesCommands:
                     currency_to=base
                     )
                 crypto_rates.append((code, rate))
-            if top > len(crypto_rates):
-                raise RateUnavailableError(
-                    extra_info=(f' Всего извлечено {len(crypto_rates)}.'
-                                f' Запрошено: {top}.')
-                    )
-            # Получаем топ N сортировкой и срезом 
-            top_n = sorted(
-                crypto_rates, 
-                key=lambda x: x[1], 
-                reverse=True
-            )[:top]
+            # Получаем топ N частичным отбором через кучу (без полной сортировки)
+            top_n = nlargest(top, crypto_rates, key=itemgetter(1))
 
             # Формируем итоговую отформатированную строку
-            result = f"Курсы из локального кэша (обновлено: {updated_at_display})"
-            for code, rate in top_n:
-                result += f"\n- {code}_{base}: {rate:.2f}"
+            result = [f"Курсы из локального кэша (обновлено: {updated_at_display})"]
+            result.extend(f"- {code}_{base}: {rate:.2f}" for code, rate in top_n)
             
-            return result
\ No newline at end of file
+            return "\n".join(result)
\ No newline at end of file
@@ -1,30 +1,47 @@
 # Модуль для вспомогательных команд
 
+import math
 import shlex
+import sys
 
 from valutatrade_hub.core.exceptions import ArgumentsError, CommandNotAllowedError
 
+# Допустимые команды и команды, которые можно вызвать без аргументов
+# (множества собираются один раз: проверка вхождения - O(1))
+_ALLOWED_COMMANDS = frozenset({
+    'register',
+    'login',
+    'logout',
+    'show-portfolio',
+    'buy',
+    'buy-usd',
+    'sell',
+    'get-rate',
+    'update-rates',
+    'show-rates',
+    'help',
+    'exit'
+})
+_NOARG_COMMANDS = frozenset({
+    'logout', 'help', 'exit', 'show-portfolio', 'update-rates'
+})
 
-class Utils:
-    def __init__(self):
-        self.allowed_commands = [
-            'register',
-            'login',
-            'logout',
-            'show-portfolio',
-            'buy',
-            'buy-usd',
-            'sell',
-            'get-rate',
-            'update-rates',
-            'show-rates',
-            'help',
-            'exit'
-        ]
-    
-    def help(self):
-        """ Возвращает доступные команды """
-        return [
+# Команды с фиксированным числом аргументов:
+# команда -> (число аргументов, подсказка, ((индекс числа, сообщение), ...))
+_BUY_AMOUNT_ERROR = 'Количество покупаемой валюты должно быть числом.'
+_ARG_SPECS = {
+    'register': (3, 'register <username> <password> <initial_usd_amount>',
+                 ((2, _BUY_AMOUNT_ERROR),)),
+    'login': (2, 'login <username> <password>', ()),
+    'buy': (2, 'buy <currency> <amount>', ((1, _BUY_AMOUNT_ERROR),)),
+    'buy-usd': (1, 'buy-usd <amount>', ((0, _BUY_AMOUNT_ERROR),)),
+    'sell': (2, 'sell <currency> <amount>',
+             ((1, 'Количество продаваемой валюты должно быть числом.'),)),
+    'get-rate': (2, 'get-rate <from_currency> <to_currency>', ()),
+}
+
+# Справка по командам (неизменяемый кортеж собирается один раз)
+_HELP_LINES = (
 'register <username> <password> <initial_usd_amount>   -> зарегистрироваться на платформе.', # noqa: E501
 'login <username> <password>                           -> выполнить вход в свой аккаунт.', # noqa: E501
 'logout                                                -> выйти из своего аккаунта.', # noqa: E501
@@ -41,7 +58,16 @@ class Utils:
 '\nБазовая валюта по умолчанию - USD.',
 '\nДоступные фиатные валюты: USD, RUB, EUR, IRR, GBP, KZT, CNY',
 'Доступные криптовалюты: BTC, ETH, SOL'
-        ]
+)
+
+
+class Utils:
+    def __init__(self):
+        self.allowed_commands = _ALLOWED_COMMANDS
+    
+    def help(self):
+        """ Возвращает доступные команды """
+        return _HELP_LINES
     
     def parse_user_input(self, user_input:str):
         """ 
@@ -60,21 +86,51 @@ class Utils:
         """
         if not isinstance(user_input, str):
             raise TypeError('Команда должна быть строкой.')
+        # Быстрый путь: без кавычек и экранирования хватает str.split,
+        # лексер shlex нужен только для таких строк
+        if '"' in user_input or "'" in user_input or '\\' in user_input:
+            user_input = shlex.split(user_input)
+        else:
+            user_input = user_input.split()
         if not user_input:
             return ''
-        user_input = shlex.split(user_input)
-        command = user_input[0]
+        # Команда приводится к нижнему регистру и интернируется один раз:
+        # дальнейший поиск обработчика сравнивает строки по ссылке
+        command = sys.intern(user_input[0].lower())
         args = user_input[1:]
 
         if command not in self.allowed_commands:
             raise CommandNotAllowedError(command)
         
-        if not args and command not in \
-            ['logout', 'help', 'exit', 'show-portfolio', 'update-rates']:
+        if not args and command not in _NOARG_COMMANDS:
             raise ArgumentsError(command)
         
         return {'command': command, 'args': args}
     
+    @staticmethod
+    def _parse_amount(value:str, error_message:str):
+        """
+        Преобразует аргумент команды в число.
+
+        Аргументы:
+            value:str - значение аргумента
+            error_message:str - сообщение об ошибке при неверном вводе
+
+        Возвращает:
+            float - число
+
+        Выбрасывает:
+            ValueError (с указанием неверного значения)
+        """
+        try:
+            amount = float(value)
+        except ValueError as e:
+            raise ValueError(f"{error_message} Получено: '{value}'.") from e
+        # float() принимает 'inf' и 'nan': такие значения - не количество валюты
+        if not math.isfinite(amount):
+            raise ValueError(f"{error_message} Получено: '{value}'.")
+        return amount
+
     def validate_command(self, command:str, args:str):
         """ 
         Метод для вадидации команд 
@@ -87,60 +143,28 @@ class Utils:
             ArgumentsError,
             ValueError
         """
-        match command:
-            case 'register':
-                if len(args) != 3:
-                    raise ArgumentsError(command,\
-                         'register <username> <password> <initial_usd_amount>')
-                try:
-                    args[2] = float(args[2])
-                except ValueError as e:
-                    raise ValueError\
-                    ('Количество покупаемой валюты должно быть числом.') from e
-            case 'login':
-                if len(args) != 2:
-                    raise ArgumentsError(command, 'login <username> <password>')
-            case 'buy':
-                if len(args) != 2:
-                    raise ArgumentsError(command, 'buy <currency> <amount>')
-                try:
-                    args[1] = float(args[1])
-                except ValueError as e:
-                    raise ValueError\
-                    ('Количество покупаемой валюты должно быть числом.') from e
-            case 'buy-usd':
-                if len(args) != 1:
-                    raise ArgumentsError(command, 'buy-usd <amount>')
-                try:
-                    args[0] = float(args[0])
-                except ValueError as e:
-                    raise ValueError\
-                    ('Количество покупаемой валюты должно быть числом.') from e
-            case 'sell':
-                if len(args) != 2:
-                    raise ArgumentsError(command, 'sell <currency> <amount>')
+        spec = _ARG_SPECS.get(command)
+        if spec is not None:
+            argc, usage, amounts = spec
+            if len(args) != argc:
+                raise ArgumentsError(command, usage)
+            for index, error_message in amounts:
+                args[index] = self._parse_amount(args[index], error_message)
+        elif command == 'show-rates':
+            if len(args) > 3:
+                raise ArgumentsError\
+                (command, 
+                 'show-rates <currency> <base> / '
+                 'show-rates <top N> <base>')
+            if args and args[0].lower() == 'top':
+                if len(args) < 2:
+                    raise ArgumentsError(command, 'show-rates <top N> <base>')
                 try:
-                    args[1] = float(args[1])
+                    args[1] = int(args[1].strip())
                 except ValueError as e:
                     raise ValueError\
-                    ('Количество продаваемой валюты должно быть числом.') from e
-            case 'get-rate':
-                if len(args) != 2:
-                    raise ArgumentsError\
-                    (command, 'get-rate <from_currency> <to_currency>')
-            case 'show-rates':
-                if len(args) > 3:
-                    raise ArgumentsError\
-                    (command, 
-                     'show-rates <currency> <base> / '
-                     'show-rates <top N> <base>')
-                if args[0] == 'top':
-                    try:
-                        args[1] = int(args[1].strip())
-                    except ValueError as e:
-                        raise ValueError\
-                        ('Количество топ-криптовалют должно быть целым числом.') from e
-            case 'update-rates':
-                if len(args) > 2:
-                    raise ArgumentsError\
-                    (command, 'update-rates <source> (coingecko/exchangerate) <base>')
\ No newline at end of file
+                    ('Количество топ-криптовалют должно быть целым числом.') from e
+        elif command == 'update-rates':
+            if len(args) > 2:
+                raise ArgumentsError\
+                (command, 'update-rates <source> (coingecko/exchangerate) <base>')
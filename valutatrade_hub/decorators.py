@@ -1,6 +1,8 @@
 import logging
 from functools import wraps
 
+from valutatrade_hub.core.exceptions import UserUnlogedError
+
 logger = logging.getLogger(__name__)
 
 def format_log(
@@ -77,6 +79,9 @@ def log_action(action:str, verbose:bool = False):
             currency_code = None
             amount = None
             base = 'USD'
+            # Если INFO-сообщения отбрасываются, контекст для лога 
+            # (курс, балансы) не собирается и строка не форматируется
+            log_enabled = logger.isEnabledFor(logging.INFO)
             
             # Извлекаем информацию о пользователе 
             self_obj = args[0] if args else None
@@ -84,7 +89,6 @@ def log_action(action:str, verbose:bool = False):
                 current_user = getattr(self_obj.session, "current_user", None)
                 if current_user:
                     username = getattr(current_user, "username", None)
-                    user_id = getattr(current_user, "user_id", None)
             
             # Извлекаем параметры функции
             # buy/sell
@@ -104,11 +108,13 @@ def log_action(action:str, verbose:bool = False):
             verbose_context = {}
 
             # Пытаемся получить информацию о состоянии кошелька до операции
-            if verbose and action in ['SELL', 'BUY', 'BUY_USD']:
+            if log_enabled and verbose and action in ['SELL', 'BUY', 'BUY_USD']:
                 if self_obj and hasattr(self_obj, "database"):
                     try:
+                        # Портфель сессии: тот же объект, с которым 
+                        # работает команда (без повторного чтения файла)
                         portfolio = self_obj\
-                            .database.find_portfolio_by_user_id(user_id)
+                            .session.get_portfolio(self_obj.database)
                         if portfolio and currency_code:
                             wallet = portfolio.get_wallet(currency_code)
                             if wallet:
@@ -126,7 +132,8 @@ def log_action(action:str, verbose:bool = False):
 
                 # Пытаемся получить курс
                 if (
-                    action in ['BUY', 'SELL'] 
+                    log_enabled
+                    and action in ['BUY', 'SELL'] 
                     and self_obj 
                     and hasattr(self_obj, "database")
                 ):
@@ -141,10 +148,11 @@ def log_action(action:str, verbose:bool = False):
                     and verbose 
                     and action in ['SELL', 'BUY', 'BUY_USD']
                 ):
-                    if self_obj and hasattr(self_obj, "database"):
+                    if self_obj and hasattr(self_obj, "session"):
                         try:
-                            portfolio = self_obj\
-                                .database.find_portfolio_by_user_id(user_id)
+                            # Портфель, с которым работала команда: 
+                            # без повторного обращения к базе
+                            portfolio = self_obj.session.current_portfolio
                             if portfolio:
                                 wallet = portfolio\
                                     .get_wallet(currency_code)
@@ -155,35 +163,53 @@ def log_action(action:str, verbose:bool = False):
                         except Exception:
                             pass
                 
-                logger.info(
-                    format_log(
-                        action=action,
-                        username=username,
-                        currency=currency_code,
-                        amount=amount,
-                        rate=rate,
-                        base=base,
-                        verbose=verbose_context,
-                        result='OK'
+                if log_enabled:
+                    logger.info(
+                        format_log(
+                            action=action,
+                            username=username,
+                            currency=currency_code,
+                            amount=amount,
+                            rate=rate,
+                            base=base,
+                            verbose=verbose_context,
+                            result='OK'
+                        )
                     )
-                )
 
                 return result
             
             except Exception as e:
-                logger.info(
-                    format_log(
-                        action,
-                        username,
-                        currency_code,
-                        amount,
-                        rate,
-                        base,
-                        result='ERROR',
-                        error_type=type(e).__name__,
-                        error_message=str(e)
+                if log_enabled:
+                    logger.info(
+                        format_log(
+                            action,
+                            username,
+                            currency_code,
+                            amount,
+                            rate,
+                            base,
+                            result='ERROR',
+                            error_type=type(e).__name__,
+                            error_message=str(e)
+                        )
                     )
-                )
                 raise
         return wrapper 
-    return decorator 
\ No newline at end of file
+    return decorator 
+
+
+def require_login(func):
+    """
+    Декоратор для методов команд, доступных только после входа в систему.
+    Проверяет сессию (self.session) до вызова метода.
+
+    Выбрасывает:
+        UserUnlogedError
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.session.current_user is None:
+            raise UserUnlogedError()
+        return func(self, *args, **kwargs)
+    return wrapper
@@ -1,9 +1,10 @@
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 
 from valutatrade_hub.core.models import Portfolio, User
+from valutatrade_hub.infra.files import atomic_write_text
 from valutatrade_hub.infra.settings import get_settings
 
 
@@ -25,48 +26,118 @@ class DatabaseManager():
         self.users_data = None 
         self.portfolios_data = None
         self.rates_data = None 
+
+        # Индексы пользователей по имени и по id, максимальный id 
+        # и список записей, по которому они построены (строятся лениво)
+        self._users_index = None
+        self._users_by_id = {}
+        self._max_user_id = 0
+        self._users_source = None
+
+        # Позиции записей портфелей по id пользователя
+        self._portfolio_positions = {}
+        self._portfolios_source = None
+
+        # Таблица курсов с обратными парами и снимок, по которому она построена
+        self._rate_table = {}
+        self._rate_table_source = None
+
+        # Время обновления курсов в секундах эпохи и снимок, для которого оно посчитано
+        self._last_refresh_epoch = None
+        self._last_refresh_source = None
+
+        # Кэш разобранных JSON-файлов: путь -> (отпечаток файла, данные)
+        self._json_cache = {}
     
+    @staticmethod
+    def _file_stamp(filepath: Path):
+        """ Отпечаток файла: меняется при любой перезаписи (в т.ч. os.replace) """
+        st = os.stat(filepath)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
     def _load_json(self, filepath: Path):
+        """ 
+        Метод для загрузки данных из JSON-файла.
+        Файл разбирается заново, только если он изменился с прошлого чтения
+        """
         try:
+            stamp = self._file_stamp(filepath)
+            cached = self._json_cache.get(filepath)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
             with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                data = json.load(f)
+            self._json_cache[filepath] = (stamp, data)
+            return data
         except (FileNotFoundError, json.JSONDecodeError):
+            self._json_cache.pop(filepath, None)
             return [] if filepath.name in ['users.json', 'portfolios.json'] else {}
     
     def _save_json(self, filepath: Path, data: dict | list):
-        """ Метод для загрузки данных из JSON-файла """
+        """ Метод для сохранения данных в JSON-файл (с обновлением кэша) """
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+            # Сериализация целиком до открытия файла: одна запись вместо 
+            # множества мелких, а ошибка сериализации не обнулит файл
+            payload = json.dumps(data, ensure_ascii=False, indent=4)
+            # Атомарная запись: данные пишутся во временный файл рядом 
+            # и подменяют исходный одним os.replace
+            atomic_write_text(filepath, payload)
+            self._json_cache[filepath] = (self._file_stamp(filepath), data)
         except Exception as e:
+            # Данные в памяти могли разойтись с файлом: кэш сбрасывается
+            self._json_cache.pop(filepath, None)
             print(('Произошла непредвиденная ошибка '
                    f'при загрузке данных в файл {filepath}: {e}'))
     
     def load_users(self) -> list[User]:
         """ Метод для загрузки содержания файла пользователей """
         self.users_data = self._load_json(self.users_file_path)
-        return [User.from_dict(user) for user in self.users_data]
+        return User.from_dicts(self.users_data)
     
     def save_users(self, users: list[User]):
         """ Метод для сохранения данных о пользователях в файл JSON """
         self.users_data = [User.to_dict(user) for user in users]
         self._save_json(self.users_file_path, self.users_data)
+        self._build_users_index(users)
+        self._users_source = self.users_data
     
+    def _build_users_index(self, users: list[User]):
+        """ Перестраивает индексы пользователей и максимальный id """
+        if self._users_index is None:
+            self._users_index = {}
+        else:
+            # Обновление на месте: ранее выданные ссылки на индекс остаются верными
+            self._users_index.clear()
+        self._users_index.update((user.username, user) for user in users)
+        self._users_by_id = {user.user_id: user for user in users}
+        self._max_user_id = max(self._users_by_id, default=0)
+
+    def get_users_index(self) -> dict[str, User]:
+        """ 
+        Метод для получения индекса пользователей: имя -> пользователь.
+        Индекс перестраивается, только если файл пользователей изменился
+        (в том числе другим процессом) с момента построения.
+        """
+        data = self._load_json(self.users_file_path)
+        if self._users_index is None or data is not self._users_source:
+            self.users_data = data
+            self._build_users_index(User.from_dicts(data))
+            self._users_source = data
+        return self._users_index
+
+    def next_user_id(self) -> int:
+        """ Метод для получения id для нового пользователя """
+        self.get_users_index()
+        return self._max_user_id + 1
+
     def find_user_by_username(self, username: str):
         """ Метод для поиска пользователя по его имени """
-        users = self.load_users()
-        for user in users:
-            if user.username == username:
-                return user
-        return None
+        return self.get_users_index().get(username)
     
     def find_user_by_id(self, user_id: int):
         """ Метод для поиска пользователя по его ID """
-        users = self.load_users()
-        for user in users:
-            if user.user_id == user_id:
-                return user 
-        return None
+        self.get_users_index()
+        return self._users_by_id.get(user_id)
 
     def load_portfolios(self) -> list[Portfolio]:
         """ Метод для загрузки содержания файла портфелей """
@@ -79,29 +150,79 @@ class DatabaseManager():
                                  for portfolio in portfolios]
         self._save_json(self.portfolios_file_path, self.portfolios_data)
     
+    def _get_portfolio_positions(self) -> dict[int, int]:
+        """ 
+        Загружает записи портфелей (self.portfolios_data) и возвращает 
+        индекс: id пользователя -> позиция записи. Индекс перестраивается, 
+        только если записи были перечитаны из измененного файла.
+        """
+        self.portfolios_data = self._load_json(self.portfolios_file_path)
+        if self.portfolios_data is not self._portfolios_source:
+            self._portfolio_positions = {
+                data.get('user_id'): i 
+                for i, data in enumerate(self.portfolios_data)
+            }
+            self._portfolios_source = self.portfolios_data
+        return self._portfolio_positions
+
+    def get_portfolio_records(self) -> list[dict]:
+        """ 
+        Метод для получения записей портфелей. Возвращается тот же 
+        объект, пока файл портфелей не изменился (в том числе другим 
+        процессом) и не был перечитан: по нему можно проверять 
+        актуальность ранее загруженного портфеля.
+        """
+        self._get_portfolio_positions()
+        return self.portfolios_data
+
     def find_portfolio_by_user_id(self, user_id: int):
-        """ Метод для поиска портфеля пользователя по его ID """
-        portfolios = self.load_portfolios()
-        for portfolio in portfolios:
-            if portfolio.user_id == user_id:
-                return portfolio 
-        return None
+        """ 
+        Метод для поиска портфеля пользователя по его ID 
+        (десериализуется только найденная запись)
+        """
+        position = self._get_portfolio_positions().get(user_id)
+        if position is None:
+            return None
+        return Portfolio.from_dict(self.portfolios_data[position])
     
     def save_portfolio(self, portfolio:Portfolio):
-        """ Метод для сохранения (обновления или создания) портфеля """
-        portfolios = self.load_portfolios()
-        exists = False
-        for i, p in enumerate(portfolios):
-            if p._user_id == portfolio._user_id:
-                portfolios[i] = portfolio 
-                exists = True
-                break 
-        
-        if not exists:
-            portfolios.append(portfolio)
+        """ 
+        Метод для сохранения (обновления или создания) портфеля.
+        Заменяется только запись этого портфеля в уже загруженных данных:
+        остальные портфели не десериализуются и не сериализуются заново.
+        """
+        positions = self._get_portfolio_positions()
+        portfolio_data = portfolio.to_dict()
+        position = positions.get(portfolio.user_id)
+        if position is not None:
+            self.portfolios_data[position] = portfolio_data
+        else:
+            positions[portfolio.user_id] = len(self.portfolios_data)
+            self.portfolios_data.append(portfolio_data)
         
-        self.save_portfolios(portfolios)
+        self._save_json(self.portfolios_file_path, self.portfolios_data)
+
+    def commit_bundle(
+            self,
+            users: list[User] = None,
+            portfolio: Portfolio = None,
+            rates: dict = None
+        ):
+        """ 
+        Метод для сохранения изменений команды одной фиксацией.
+        Записываются только переданные (измененные) данные, 
+        остальные файлы не трогаются:
 
+        - users: Полный список пользователей
+        - portfolio: Новый или измененный портфель
+        - rates: Данные о курсах ({'rates': ..., 'last_refresh': ...})
+        """
+        if users is not None:
+            self.save_users(users)
+        if portfolio is not None:
+            self.save_portfolio(portfolio)
+        if rates is not None:
+            self.save_rates(rates)
     
     def load_rates(self):
         """ Метод для загрузки данных о курсах валют """
@@ -114,6 +235,24 @@ class DatabaseManager():
         self.rates_data.setdefault('last_refresh', None)
 
         return self.rates_data
+
+    def get_last_refresh_epoch(self, rates_data: dict):
+        """ 
+        Метод для получения времени обновления курсов в секундах эпохи
+        (None, если курсы не обновлялись): проверка свежести кэша 
+        сводится к сравнению чисел. Строка last_refresh разбирается 
+        один раз для каждого снимка курсов.
+
+        - rates_data: Данные о курсах ({'rates': ..., 'last_refresh': ...})
+        """
+        if rates_data is not self._last_refresh_source:
+            last_refresh = rates_data.get('last_refresh')
+            self._last_refresh_epoch = (
+                datetime.fromisoformat(last_refresh).timestamp()
+                if last_refresh else None
+            )
+            self._last_refresh_source = rates_data
+        return self._last_refresh_epoch
     
     def save_rates(self, data: dict):
         """ Метод для схранения данных о курсах валют в файл JSON """
@@ -130,37 +269,86 @@ class DatabaseManager():
         - from_currency: Исходная валюта
         - to_currency: Целевая валюта
         """
-        from_currency = from_currency.upper()
-        to_currency = to_currency.upper()
+        self.rates_data = self.load_rates()
+        return self.get_rate_from(self.rates_data, from_currency, to_currency)
+
+    def get_rate_from(self, rates_data: dict, from_currency: str, to_currency: str):
+        """ 
+        Метод для получения курса пары из уже загруженных данных о курсах
+        (без повторного чтения файла):
+
+        - rates_data: Данные о курсах ({'rates': ..., 'last_refresh': ...})
+        - from_currency: Исходная валюта
+        - to_currency: Целевая валюта
+        """
+        table = self._get_rate_table(rates_data)
+        return table.get(f'{from_currency.upper()}_{to_currency.upper()}')
+
+    def get_rates(self, currencies: list[str], to_currency: str):
+        """ 
+        Метод для получения курсов нескольких валют к одной целевой 
+        (файл курсов читается один раз на все валюты):
 
+        - currencies: Исходные валюты
+        - to_currency: Целевая валюта
+
+        Возвращает словарь {валюта: курс или None}
+        """
+        to_currency = to_currency.upper()
         self.rates_data = self.load_rates()
-        rates = self.rates_data.get('rates')
-        
-        rate_key_direct = f'{from_currency}_{to_currency}'
-        if rate_key_direct in rates:
-            pair = rates.get(rate_key_direct)
-            return pair.get('rate')
-        
-        rate_key_reverse = f'{to_currency}_{from_currency}'
-        if rate_key_reverse in rates:
-            pair = rates.get(rate_key_reverse)
-            return 1 / pair.get('rate')
-        
-        return None
+        table = self._get_rate_table(self.rates_data)
+        return {
+            currency: table.get(f'{currency.upper()}_{to_currency}')
+            for currency in currencies
+        }
+
+    def _get_rate_table(self, rates_data: dict) -> dict[str, float]:
+        """ 
+        Возвращает таблицу курсов 'FROM_TO' -> курс, где для каждой пары 
+        заранее посчитан и обратный курс. Таблица строится один раз 
+        для каждого снимка курсов; прямой курс имеет приоритет над обратным.
+        Поврежденные записи и нулевые курсы пропускаются.
+        """
+        if rates_data is self._rate_table_source:
+            return self._rate_table
+        direct = {}
+        reverse = {}
+        for pair, entry in (rates_data.get('rates') or {}).items():
+            try:
+                rate = entry['rate']
+            except (KeyError, TypeError):
+                continue
+            if not rate:
+                continue
+            from_currency, _, to_currency = pair.partition('_')
+            direct[pair] = rate
+            reverse[f'{to_currency}_{from_currency}'] = 1 / rate
+        reverse.update(direct)
+        self._rate_table = reverse
+        self._rate_table_source = rates_data
+        return reverse
     
+    def save_rate_pairs(self, pairs: dict):
+        """ 
+        Метод для обновления нескольких пар курсов одной записью в файл:
+
+        - pairs: Словарь {'FROM_TO': {'rate': ..., 'updated_at': ...}}
+        """
+        self.rates_data = self.load_rates()
+        self.rates_data['rates'].update(pairs)
+        self.save_rates(self.rates_data)
+
     def update_rate(self, from_currency: str, to_currency: str, rate: float):
         """ Метод для обновления курса валют """
-        self.rate_data = self.load_rates()
-        rates = self.rates_data.setdefault('rates', {})
-        from_currency = from_currency.upper()
-        to_currency = to_currency.upper()
-
-        rate_key = f'{from_currency}_{to_currency}'
-        rates[rate_key] = {
-            "rate": rate,
-            "updated_at": datetime.now().isoformat()
-        }
-        self.save_rates(self.rate_data)
+        rate_key = f'{from_currency.upper()}_{to_currency.upper()}'
+        self.save_rate_pairs({
+            rate_key: {
+                "rate": rate,
+                # Тот же формат, что пишет Parser Service: ISO-8601 в UTC с 'Z'
+                "updated_at": datetime.now(timezone.utc)\
+                    .replace(microsecond=0).isoformat().replace('+00:00', 'Z')
+            }
+        })
 
 
 # Гарантия единственности экземпляра 
@@ -0,0 +1,32 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+
+def atomic_write_text(filepath: Path, text: str):
+    """
+    Функция для атомарной записи текста в файл.
+    Принцип: файл либо полностью обновлен, либо не изменяется вообще.
+
+    Текст пишется во временный файл рядом с целевым и подменяет его
+    одним os.replace. Временный файл создается с обычными правами
+    (с учетом umask), права уже существующего файла сохраняются.
+    При ошибке временный файл удаляется.
+
+    Аргументы:
+        filepath:Path - путь к целевому файлу
+        text:str - содержимое файла
+    """
+    tmp_path = filepath.with_name(f'.{filepath.name}.{uuid.uuid4().hex}.tmp')
+    try:
+        with open(tmp_path, 'x', encoding='utf-8') as tmp:
+            tmp.write(text)
+        try:
+            shutil.copymode(filepath, tmp_path)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
@@ -1,7 +1,7 @@
 import os
+import tomllib
 from pathlib import Path
 
-import toml
 from dotenv import load_dotenv
 
 from valutatrade_hub.core.exceptions import NoContentError
@@ -38,6 +38,7 @@ class SettingsLoader:
             return
         self._load_config()
         self._load_env()
+        self.__class__._initialized = True
     
     def _load_config(self):
         """
@@ -47,8 +48,8 @@ class SettingsLoader:
         pyproject_filepath = "pyproject.toml"
 
         try:
-            with open(pyproject_filepath, 'r', encoding='utf-8') as f:
-                pyproject_content = toml.load(f)
+            with open(pyproject_filepath, 'rb') as f:
+                pyproject_content = tomllib.load(f)
             valtatrade_config = pyproject_content.\
                 get('tool', {}).get('valutatrade', {})
             if valtatrade_config:
@@ -58,7 +59,7 @@ class SettingsLoader:
             self.__class__._config = config_data
         except FileNotFoundError:
             raise RuntimeError(f'Файл {pyproject_filepath} не найден.')
-        except toml.TomlDecodeError as e:
+        except tomllib.TOMLDecodeError as e:
             raise RuntimeError(f'Ошибка парсинга файла {pyproject_filepath}: {e}')
         except NoContentError as e:
             raise RuntimeError(str(e))
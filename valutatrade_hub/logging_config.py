@@ -4,11 +4,19 @@ from pathlib import Path
 
 from valutatrade_hub.infra.settings import get_settings
 
+# Флаг, гарантирующий однократную настройку логирования
+_configured = False
+
 
 def setup_logging(level=logging.INFO):
     """
-    Функция настройки логирования
+    Функция настройки логирования.
+    Повторный вызов ничего не делает, чтоб не дублировать обработчики.
     """
+    global _configured
+    if _configured:
+        return
+
     settings = get_settings()
 
     # Создадим директорию для лог-файлов
@@ -57,4 +65,6 @@ def setup_logging(level=logging.INFO):
         parser_handler.setLevel(logging.DEBUG)
         parser_logger.setLevel(logging.DEBUG)
         parser_logger.addHandler(parser_handler)
-        parser_logger.propagate = False
\ No newline at end of file
+        parser_logger.propagate = False
+
+    _configured = True
@@ -34,10 +34,13 @@ class CoinGeckoClient(BaseApiClient):
     """
     def __init__(self, config: ParserConfig):
         self.config = config
+        # Сессия переиспользует TCP/TLS-соединения между обновлениями курсов
+        self.session = requests.Session()
+        # Последний ответ по каждой базе: база -> (ETag, курсы)
+        self._etag_cache = {}
     
     def fetch_rates(self, base:str = None):
         
-        ids = ",".join(self.config.CRYPTO_ID_MAP.values())
         if base:
             # Валидация кода валюты
             get_currency(base.upper())
@@ -46,30 +49,57 @@ class CoinGeckoClient(BaseApiClient):
             vs_currencies = self.config.BASE_CURRENCY.lower()
 
         params = {
-            'ids': ids,
+            'ids': self.config.CRYPTO_IDS,
             'vs_currencies': vs_currencies
         }
 
+        # Условный запрос: если данные не менялись, API ответит 304 без тела
+        cached = self._etag_cache.get(vs_currencies)
+        headers = {'If-None-Match': cached[0]} if cached else None
+
         try:
-            start = time.perf_counter()
-            response = requests.get(
+            start = time.perf_counter_ns()
+            response = self.session.get(
                 self.config.COINGECKO_URL,
                 params=params,
+                headers=headers,
                 timeout=self.config.REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            elapsed_ms = int((time.perf_counter() - start) * 1000)
+            elapsed_ms = (time.perf_counter_ns() - start) // 1_000_000
         except requests.exceptions.RequestException as e:
             raise ApiRequestError(f"CoinGecko: {str(e)}") from e
 
+        if response.status_code == 304 and cached:
+            # Курсы прежние: меняются только время и сведения о запросе
+            updated_at = datetime.now(timezone.utc)\
+                .replace(microsecond=0).isoformat().replace('+00:00', 'Z')
+            return {
+                pair: {
+                    **info,
+                    'timestamp': updated_at,
+                    'meta': {
+                        **info['meta'],
+                        'request_ms': elapsed_ms,
+                        'status_code': response.status_code
+                    }
+                }
+                for pair, info in cached[1].items()
+            }
+
         if response.text.strip():
             data = response.json()
         else:
             data = {}
         rates = {}
-
-        for code, name in self.config.CRYPTO_ID_MAP.items():
-            pair = f"{code}_{vs_currencies.upper()}"
+        # Время, код базы и ключ ответа вычисляются один раз на весь запрос
+        updated_at = datetime.now(timezone.utc)\
+            .replace(microsecond=0).isoformat().replace('+00:00', 'Z')
+        base_upper = vs_currencies.upper()
+        base_lower = vs_currencies.lower()
+
+        for code, name in self.config.CRYPTO_ITEMS:
+            pair = f"{code}_{base_upper}"
             try:
                 if data:
                     rate_info = data.get(name)
@@ -81,12 +111,10 @@ class CoinGeckoClient(BaseApiClient):
                     raise ApiRequestError(
                         f'CoinGecko: Нет курса для {code} ({name}).'
                     )
-                rate = rate_info.get(vs_currencies.lower())
-                updated_at = datetime.now(timezone.utc)\
-                    .replace(microsecond=0).isoformat().replace('+00:00', 'Z')
+                rate = rate_info.get(base_lower)
                 rates[pair] = {
                      'from_currency': code,
-                     'to_currency': vs_currencies.upper(),
+                     'to_currency': base_upper,
                      'rate': float(rate),
                      'timestamp': updated_at,
                      'source': 'CoinGecko',
@@ -100,6 +128,9 @@ class CoinGeckoClient(BaseApiClient):
             except (TypeError, KeyError) as e:
                 raise ApiRequestError(reason=f"CoinGecko: {str(e)}") from e 
         
+        etag = response.headers.get('ETag')
+        if etag:
+            self._etag_cache[vs_currencies] = (etag, rates)
         return rates 
 
 
@@ -118,6 +149,8 @@ class ExchangeRateApiClient(BaseApiClient):
     """
     def __init__(self, config: ParserConfig):
         self.config = config
+        # Сессия переиспользует TCP/TLS-соединения между обновлениями курсов
+        self.session = requests.Session()
     
     def fetch_rates(self,base:str = None):
         base_url = self.config.EXCHANGE_RATE_URL
@@ -139,13 +172,13 @@ class ExchangeRateApiClient(BaseApiClient):
         currencies = self.config.FIAT_CURRENCIES
 
         try:
-            start = time.perf_counter()
-            response = requests.get(
+            start = time.perf_counter_ns()
+            response = self.session.get(
                 url, 
                 timeout=self.config.REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            elapsed_ms = int((time.perf_counter() - start) * 1000)
+            elapsed_ms = (time.perf_counter_ns() - start) // 1_000_000
         except requests.exceptions.RequestException as e:
             raise ApiRequestError(reason=f"ExchangeRate-API: {str(e)}") from e
 
@@ -172,6 +205,9 @@ class ExchangeRateApiClient(BaseApiClient):
                     reason='ExchangeRate-API: Неверная структура ответа API.')
 
             rates = {}
+            # Все курсы получены одним запросом: время фиксируется один раз
+            updated_at = datetime.now(timezone.utc)\
+                .replace(microsecond=0).isoformat().replace('+00:00', 'Z')
 
             for code in currencies:
                 pair = f"{code}_{base_currency}"
@@ -180,8 +216,6 @@ class ExchangeRateApiClient(BaseApiClient):
                 if not rate:
                     raise ApiRequestError(
                         reason=f"ExchangeRate-API: Нет курса для {code}.")
-                updated_at = datetime.now(timezone.utc)\
-                        .replace(microsecond=0).isoformat().replace('+00:00', 'Z')
                 rates[pair] = {
                     'from_currency': code,
                     'to_currency': base_currency,
@@ -1,15 +1,15 @@
-import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
-from dotenv import load_dotenv
+from valutatrade_hub.infra.settings import get_settings
 
 
 @dataclass 
 class ParserConfig:
     # API ключ для доступа к ExchangeRate 
-    load_dotenv(".env")
-    EXCHANGE_RATE_API_KEY = os.getenv("API_KEY")
+    # (если не передан явно - берется из настроек, .env читается один раз)
+    EXCHANGE_RATE_API_KEY: str | None = None
 
     # Эндпоинты
     COINGECKO_URL = "https://api.coingecko.com/api/v3/simple/price"
@@ -24,6 +24,10 @@ class ParserConfig:
         "ETH": "ethereum",
         "SOL": "solana",
     }
+    # Производные от CRYPTO_ID_MAP, собираются один раз при импорте:
+    # строка id для запроса к CoinGecko и пары (код, id) для обхода ответа
+    CRYPTO_IDS = ",".join(CRYPTO_ID_MAP.values())
+    CRYPTO_ITEMS = tuple(CRYPTO_ID_MAP.items())
 
     # Пути
     DATA_DIR = Path("data")
@@ -31,4 +35,19 @@ class ParserConfig:
     HISTORY_FILE_PATH = DATA_DIR / "exchange_rates.json"
 
     # Сетевые параметры
-    REQUEST_TIMEOUT = 10 # 10 секунд 
\ No newline at end of file
+    REQUEST_TIMEOUT = 10 # 10 секунд 
+
+    def __post_init__(self):
+        if self.EXCHANGE_RATE_API_KEY is None:
+            self.EXCHANGE_RATE_API_KEY = get_settings().get_api_key()
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def crypto_pairs(base: str) -> tuple[tuple[str, str], ...]:
+        """ 
+        Возвращает пары (код, 'КОД_BASE') для всех криптовалют.
+        Строки ключей собираются один раз для каждой базовой валюты.
+        """
+        return tuple(
+            (code, f"{code}_{base}") for code in ParserConfig.CRYPTO_ID_MAP
+        )
@@ -30,8 +30,11 @@ class RatesScheduler:
         """
         Основной цикл планировщика обновления курсов.
         """
+        # Монотонные часы не зависят от переводов системного времени (NTP),
+        # а время следующего запуска отсчитывается от предыдущего: без дрейфа
+        next_wake = time.monotonic()
         while not self._stop_event.is_set():
-            start_time = time.time()
+            next_wake += self.time_interval
             try:
                 logger.info("Запуск автоматического обновления курсов."
                             f" Источник: {self.source or 'все'}")
@@ -42,8 +45,12 @@ class RatesScheduler:
             except Exception:
                 logger.exception(("Произошла непредвиденная ошибка "
                         "во время автоматического обновления курсов."))
-            elapsed = time.time() - start_time 
-            sleep_time = max(0, self.time_interval - elapsed)
+            now = time.monotonic()
+            if next_wake < now:
+                # Обновление длилось дольше интервала: пропущенные запуски
+                # не наверстываются, отсчет идет от текущего момента
+                next_wake = now
+            sleep_time = next_wake - now
             logger.debug(f"Следующее обновление через {sleep_time} сек.")
             self._stop_event.wait(timeout=sleep_time)
     
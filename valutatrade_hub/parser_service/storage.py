@@ -1,63 +1,193 @@
 import json
-import tempfile
+import os
+import textwrap
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:
+    # Windows: межпроцессная блокировка недоступна, остается блокировка потоков
+    fcntl = None
+
+from valutatrade_hub.infra.files import atomic_write_text
 from valutatrade_hub.parser_service.config import ParserConfig
 
+# Общая блокировка истории для всех экземпляров HistoryStorage в процессе
+# (планировщик и ручной update-rates пишут из разных потоков)
+_history_lock = threading.Lock()
+
 
 class HistoryStorage:
     def __init__(self, config: ParserConfig):
         self.config = config
         self.file = config.HISTORY_FILE_PATH
         self.file.parent.mkdir(parents=True, exist_ok=True)
+        # Отдельный файл блокировки: сам файл истории 
+        # при полной перезаписи подменяется новым
+        self.lock_file = self.file.with_name(f'{self.file.name}.lock')
+    
+    @contextmanager
+    def _locked(self):
+        """
+        Монопольный доступ к файлу истории: между потоками процесса 
+        и (где доступен fcntl) между процессами.
+        """
+        with _history_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_file, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
     
     def append(self, records:list):
         """
         Метод для добавления новых записей.
+        Новые записи дописываются в конец JSON-массива на месте: 
+        история не читается и не сериализуется заново целиком.
+        Запись выполняется под блокировкой: одновременные добавления
+        не перемешиваются.
         """
-        existing = []
-        if self.file.exists() and self.file.stat().st_size > 0:
-            existing = json.loads(self.file.read_text(encoding='utf-8'))
-        
-        existing.extend(records)
+        if not records:
+            return
+        with self._locked():
+            # Наличие файла проверяется самим открытием (без отдельных stat)
+            try:
+                if self._append_in_place(records):
+                    return
+                # Файл пуст или не оканчивается массивом: полная перезапись
+                text = self.file.read_text(encoding='utf-8')
+                existing = json.loads(text) if text.strip() else []
+            except FileNotFoundError:
+                existing = []
+            
+            existing.extend(records)
 
-        self._atomic_write(existing)
+            self._atomic_write(existing)
+    
+    def _append_in_place(self, records:list) -> bool:
+        """
+        Дописывает записи перед закрывающей скобкой массива в том же 
+        формате, что и json.dump(..., indent=4). 
+        Возвращает False, если конец файла не похож на JSON-массив.
+        Если запись не удалась (нет места на диске, прерывание), 
+        исходный конец файла восстанавливается и ошибка пробрасывается.
+        """
+        body = ',\n'.join(
+            textwrap.indent(
+                json.dumps(record, ensure_ascii=False, indent=4), '    '
+            )
+            for record in records
+        )
+        # Без буферизации: каждая запись сразу уходит в файл, 
+        # а неполная запись видна по числу записанных байт
+        with open(self.file, 'r+b', buffering=0) as f:
+            size = f.seek(0, os.SEEK_END)
+            tail_start = max(0, size - 64)
+            f.seek(tail_start)
+            tail = f.read()
+            bracket = tail.rfind(b']')
+            if bracket == -1 or tail[bracket + 1:].strip():
+                return False
+            head = tail[:bracket].rstrip()
+            if not head:
+                return False
+            separator = '\n' if head.endswith(b'[') else ',\n'
+            payload = f"{separator}{body}\n]".encode('utf-8')
+            f.seek(tail_start + len(head))
+            try:
+                if f.write(payload) != len(payload):
+                    raise OSError('Записи истории курсов записаны не полностью.')
+                f.truncate()
+                os.fsync(f.fileno())
+            except BaseException:
+                # Возвращаем исходный конец массива: файл остается валидным JSON
+                f.seek(tail_start)
+                f.write(tail)
+                f.truncate()
+                os.fsync(f.fileno())
+                raise
+        return True
     
     def _atomic_write(self, data):
         """
         Метод для реализации атомарной записи в файл exchange_rates.json.
         Принцип: файл либо полностью иобновлен, либо не изменяется вообще.
         """
-        with tempfile.NamedTemporaryFile(
-            mode='w', encoding='utf-8', delete=False, dir=self.file.parent
-        ) as tmp:
-            json.dump(data, tmp, ensure_ascii=False, indent=4)
-            tmp_path = Path(tmp.name)
-        tmp_path.replace(self.file)
+        atomic_write_text(
+            self.file, json.dumps(data, ensure_ascii=False, indent=4)
+        )
 
 
 class RatesStorage:
+    """
+    Хранилище снимка курсов (rates.json).
+    Все метки времени (last_refresh, updated_at) пишутся в формате 
+    ISO-8601 UTC 'YYYY-MM-DDTHH:MM:SSZ' и читаются datetime.fromisoformat.
+    """
     def __init__(self, config: ParserConfig):
         self.config = config
         self.file = config.RATES_FILE_PATH
         self.file.parent.mkdir(parents=True, exist_ok=True)
     
-    def save_rates(self, pairs:dict):
+    def save_rates(self, pairs:dict, last_refresh:str = None):
+        """
+        Метод для сохранения снимка курсов. Возвращает записанные данные.
+        Время обновления (last_refresh, ISO-строка в UTC) можно передать 
+        готовым; по умолчанию берется текущее.
+        """
         if not isinstance(pairs, dict):
             raise TypeError\
                 ('Данные о курсах валют должны передаваться в словаре.')
+        if last_refresh is None:
+            last_refresh = datetime.now(timezone.utc)\
+                .replace(microsecond=0).isoformat().replace('+00:00', 'Z')
         data = {
             'rates': pairs,
-            'last_refresh': datetime.now(timezone.utc)\
-                .replace(microsecond=0).isoformat().replace('+00:00', 'Z')
+            'last_refresh': last_refresh
+        }
+        self._atomic_write(data)
+        return data
+
+    def merge_rates(self, pairs:dict, last_refresh:str = None):
+        """
+        Метод для обновления части пар в сохраненном снимке курсов.
+        Остальные пары (например, от источника, не ответившего при 
+        обновлении) сохраняются вместе со своим updated_at.
+        Если такие пары остались, last_refresh снимка не сдвигается: 
+        по нему проверяется свежесть всего кэша.
+        Возвращает записанные данные.
+        """
+        if not isinstance(pairs, dict):
+            raise TypeError\
+                ('Данные о курсах валют должны передаваться в словаре.')
+        try:
+            with open(self.file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            existing = snapshot.get('rates') or {}
+            previous_refresh = snapshot.get('last_refresh')
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            existing = {}
+            previous_refresh = None
+        kept_pairs = existing.keys() - pairs.keys()
+        existing.update(pairs)
+        if not kept_pairs:
+            return self.save_rates(existing, last_refresh=last_refresh)
+        # В снимке остаются пары, не обновленные в этот раз: 
+        # время обновления снимка остается прежним
+        data = {
+            'rates': existing,
+            'last_refresh': previous_refresh
         }
         self._atomic_write(data)
+        return data
 
     def _atomic_write(self, data):
-        with tempfile.NamedTemporaryFile(
-            mode='w', encoding='utf-8', delete=False, dir=self.file.parent 
-        ) as tmp:
-            json.dump(data, tmp, ensure_ascii=False, indent=4)
-            tmp_path = Path(tmp.name)
-        tmp_path.replace(self.file)
\ No newline at end of file
+        atomic_write_text(
+            self.file, json.dumps(data, ensure_ascii=False, indent=4)
+        )
\ No newline at end of file
@@ -1,4 +1,5 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 from valutatrade_hub.core.currencies import get_currency
@@ -21,6 +22,13 @@ class RatesUpdater:
         self.cache = RatesStorage(config)
     
     def run_update(self, source:str = None, base:str = None):
+        """
+        Обновляет курсы из источников (всех или указанного).
+        Возвращает записанные в кэш данные ({'rates', 'last_refresh'})
+        или None, если курсов не получено.
+        При сбое части источников сохраняются курсы остальных;
+        ApiRequestError выбрасывается, только если не ответил ни один.
+        """
         if source:
             source = source.lower()
         if base:
@@ -33,34 +41,66 @@ class RatesUpdater:
         logger.info('Запускаем обновление курсов...')
         history_records = []
         cache_snapshot = {}
-        last_updated = datetime.now(timezone.utc)\
-            .isoformat().replace('T', ' ').replace('+00:00', '')
-        # Получаем данные
-        for name, client in self.clients.items():
-            if source and name != source:
-                continue
-            try:
-                data = client.fetch_rates(base=base_currency)
-                logger.info(f"Извлечено {len(data)} курсов из {name}.")
+        errors = {}
+        # Время обновления фиксируется один раз: и для кэша, и для лога
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        last_refresh = now.isoformat().replace('+00:00', 'Z')
+        last_updated = last_refresh.replace('T', ' ').replace('Z', '')
+        # Получаем данные: источники опрашиваются параллельно 
+        # (ожидание ответа сети отпускает GIL), а результаты 
+        # обрабатываются в порядке источников
+        selected = {
+            name: client for name, client in self.clients.items()
+            if not source or name == source
+        }
+        with ThreadPoolExecutor(max_workers=len(selected) or 1) as executor:
+            futures = {
+                name: executor.submit(client.fetch_rates, base=base_currency)
+                for name, client in selected.items()
+            }
+            for name, future in futures.items():
+                try:
+                    data = future.result()
+                    logger.info(f"Извлечено {len(data)} курсов из {name}.")
 
-                for pair, rates in data.items():
-                    record_id = f"{pair}_{rates.get('timestamp')}"
-                    history_records.append({'id': record_id, **rates})
-                    cache_snapshot[pair] = {
-                        "rate": rates.get('rate'),
-                        "updated_at": rates.get('timestamp'),
-                        "source": rates.get('source')
-                    }
-            except Exception as e:
-                logger.exception(f'Произошла ошибка извлечения курсов из {name}: {e}')
-                raise ApiRequestError from e
+                    # Клиенты гарантируют поля rate/timestamp/source у каждой пары
+                    history_records.extend(
+                        {'id': f"{pair}_{rates['timestamp']}", **rates}
+                        for pair, rates in data.items()
+                    )
+                    cache_snapshot.update({
+                        pair: {
+                            "rate": rates['rate'],
+                            "updated_at": rates['timestamp'],
+                            "source": rates['source']
+                        }
+                        for pair, rates in data.items()
+                    })
+                except Exception as e:
+                    # Сбой одного источника не отменяет результаты остальных
+                    logger.exception(
+                        f'Произошла ошибка извлечения курсов из {name}: {e}'
+                    )
+                    errors[name] = e
+        if errors:
+            reason = '; '.join(
+                f"{name}: {getattr(e, 'reason', e)}" for name, e in errors.items()
+            )
+            if not cache_snapshot:
+                raise ApiRequestError(reason)
+            logger.warning(f'Курсы обновлены частично. Ошибки: {reason}')
         if history_records:
             self.history.append(history_records)
+        rates_data = None
         if cache_snapshot:
             logger.info((f"Сохраняем {len(cache_snapshot)} курсов "
                          f"в {self.config.RATES_FILE_PATH}"))
-            self.cache.save_rates(cache_snapshot)
+            # При частичном обновлении новые пары дописываются к снимку,
+            # а не заменяют его: курсы упавшего источника не теряются
+            save_rates = self.cache.merge_rates if errors else self.cache.save_rates
+            rates_data = save_rates(cache_snapshot, last_refresh=last_refresh)
         
         logger.info(f"Обновление курсов завершено успешно. "
                     f" Всего обновлено: {len(cache_snapshot)} курсов. "
-                    f" Последнее обновление: {last_updated}")
\ No newline at end of file
+                    f" Последнее обновление: {last_updated}")
+        return rates_data